@@ -1,12 +1,16 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.config import settings
 from app.core.limiter import limiter
 from app.models.user import User
 from app.models.analysis import Analysis
 from app.schemas.analysis import AnalysisRequest as AnalysisBody, AnalysisResponse, AnalysisList
 from app.api.auth import get_current_user
+from app.services.llm_service import llm_service
+from app.services.scoring_service import scoring_service
+from app.tasks.analysis_tasks import load_user_preferences, run_analysis_background
 
 from typing import List
 import json
@@ -45,7 +49,6 @@ def create_analysis(
         db.commit()
         db.refresh(new_analysis)
 
-        from app.tasks.analysis_tasks import run_analysis_background
         background_tasks.add_task(run_analysis_background, new_analysis.id)
 
         print(f"Analysis {new_analysis.id} queued for user {current_user.id}")
@@ -133,6 +136,88 @@ def get_analysis(
     return response
 
 
+@router.get("/{analysis_id}/insights/stream")
+async def stream_analysis_insights(
+    analysis_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    SSE stream of the AI insights for a completed analysis.
+
+    Each section is pushed as soon as the model finishes it
+    ('event: overview_summary', then lifestyle_changes, ai_insights,
+    action_steps), followed by 'event: complete' with the full result,
+    which is also saved on the analysis. Inputs match the background
+    pipeline's, so a just-finished analysis replays from the LLM cache.
+    """
+    analysis = db.query(Analysis).filter(
+        Analysis.id == analysis_id,
+        Analysis.user_id == current_user.id
+    ).first()
+
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found"
+        )
+    if analysis.status != 'completed':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Analysis is not complete yet"
+        )
+
+    data = {
+        'crime_data':     analysis.crime_data or {},
+        'noise_data':     analysis.noise_data or {},
+        'cost_data':      analysis.cost_data or {},
+        'amenities_data': analysis.amenities_data or {},
+        'commute_data':   analysis.commute_data or {},
+    }
+    scores = scoring_service.calculate_overall_score(**data)
+    user_preferences = load_user_preferences(db, current_user.id)
+    events = llm_service.stream_lifestyle_analysis(
+        analysis.current_address, analysis.destination_address,
+        data['crime_data'], data['amenities_data'], data['cost_data'],
+        data['noise_data'], data['commute_data'],
+        user_preferences, scores,
+    )
+
+    async def generate():
+        try:
+            async for event in events:
+                # Stop reading from the model as soon as the browser goes away
+                if await request.is_disconnected():
+                    break
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                if event['event'] == 'complete':
+                    _save_insights(analysis_id, event['data'])
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # tell nginx not to buffer SSE
+        },
+    )
+
+
+def _save_insights(analysis_id: int, result: dict) -> None:
+    """Store streamed insights with their own session; the request's is closed by now."""
+    with SessionLocal() as db:
+        analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+        if analysis:
+            analysis.overview_summary = result.get('overview_summary')
+            analysis.lifestyle_changes = result.get('lifestyle_changes')
+            analysis.ai_insights = result.get('ai_insights')
+            analysis.action_steps_json = json.dumps(result.get('action_steps', []))
+            db.commit()
+
+
 @router.delete("/{analysis_id}")
 def delete_analysis(
     analysis_id: int,
@@ -1,3 +1,5 @@
+import asyncio
+
 from celery import Celery
 
 
@@ -33,3 +35,21 @@ def make_celery() -> Celery:
 
 
 celery_app = make_celery()
+
+
+def run_async(coro):
+    """
+    Run a coroutine from a Celery task. Like asyncio.run(), each call gets a fresh
+    event loop, so the per-loop httpx and Groq pools it opened are closed before
+    the loop goes away instead of leaking their sockets.
+    """
+    async def _main():
+        from app.core.http_client import close_async_client
+        from app.services.llm_service import close_groq_client
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+            await close_groq_client()
+
+    return asyncio.run(_main())
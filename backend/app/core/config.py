@@ -13,7 +13,11 @@ class Settings(BaseSettings):
     
     # Required APIs
     GROQ_API_KEY: str
+    # Max Groq completions in flight per process (excess analyses queue on a semaphore)
+    GROQ_MAX_CONCURRENCY: int = 8
     GOOGLE_MAPS_API_KEY: str
+    # Client-side cap on Google Maps requests per second (shared by all Places threads)
+    GOOGLE_PLACES_QPS: int = 50
     
     # Redis (Upstash or any Redis-compatible URL)
     REDIS_URL: Optional[str] = None
@@ -33,6 +37,9 @@ class Settings(BaseSettings):
     HUD_API_KEY: Optional[str] = None
     BLS_API_KEY: Optional[str] = None
     OSM_USER_AGENT: Optional[str] = "movewise_app_v1"
+
+    # Comma-separated state codes whose FBI data is pre-warmed on startup and every 24h
+    FBI_PREFETCH_STATES: str = ""
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000,https://movewise-web.vercel.app"
@@ -40,6 +47,10 @@ class Settings(BaseSettings):
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+
+    @property
+    def fbi_prefetch_states_list(self) -> List[str]:
+        return [s.strip().upper() for s in self.FBI_PREFETCH_STATES.split(",") if s.strip()]
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,23 @@
+import math
+
+_EARTH_RADIUS_M = 6_371_000
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters between two (lat, lng) points in degrees."""
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(d_lng / 2) ** 2)
+    return _EARTH_RADIUS_M * 2 * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def normalize_address(address: str) -> str:
+    """Cache-key form of an address: case and spacing don't change where it is."""
+    return ' '.join(address.casefold().split())
+
+
+def geocode_cache_key(address: str) -> str:
+    """Cache key for an address's coordinates."""
+    return f"geocode:{normalize_address(address)}"
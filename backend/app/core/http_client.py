@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import weakref
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# One pool per event loop: httpx connections are bound to the loop that opened them,
+# and Celery tasks run their own loop via celery_app.run_async(), which closes it again.
+_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+_DEFAULT_TIMEOUT = 15.0
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient for the running event loop, creating it on first use.
+    Keep-alive connections are reused across calls, so TLS handshakes are paid once per host.
+    Callers must not close it — pass a per-request timeout= instead of building a new client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        # Transport-level retries cover connect errors only (never a received response)
+        transport = httpx.AsyncHTTPTransport(retries=2, limits=_LIMITS)
+        client = httpx.AsyncClient(timeout=_DEFAULT_TIMEOUT, transport=transport)
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the shared client for the running event loop, if one was created."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Shared HTTP client closed")
@@ -1,10 +1,22 @@
-import json
 import logging
-from typing import Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
 CACHE_7_DAYS = 7 * 24 * 60 * 60  # seconds
+CACHE_30_DAYS = 30 * 24 * 60 * 60
+# FBI UCR data is published annually, so a quarter keeps it fresh without refetching
+CACHE_90_DAYS = 90 * 24 * 60 * 60
+
+# In-process L1 in front of Redis: repeat lookups in the same worker skip the network.
+# Values are kept as JSON strings so every hit hands back a fresh copy.
+_LOCAL_MAX_ENTRIES = 1024
+_LOCAL_TTL_ON_READ = 5 * 60  # Redis does not report remaining TTL on GET, so re-check it soon
 
 
 def _get_client():
@@ -35,14 +47,51 @@ def _redis():
     return _client
 
 
+_local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _local_get(key: str) -> Optional[str]:
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        expires_at, raw = entry
+        if expires_at < time.monotonic():
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return raw
+
+
+def _local_set(key: str, raw: str, ttl: int) -> None:
+    with _local_lock:
+        _local[key] = (time.monotonic() + ttl, raw)
+        _local.move_to_end(key)
+        while len(_local) > _LOCAL_MAX_ENTRIES:
+            _local.popitem(last=False)
+
+
+def cache_clear_local() -> None:
+    """Drop every entry from the in-process cache (Redis is untouched)."""
+    with _local_lock:
+        _local.clear()
+
+
 def cache_get(key: str) -> Optional[Any]:
     """Return parsed JSON value for key, or None on miss/error."""
+    raw = _local_get(key)
+    if raw is not None:
+        return orjson.loads(raw)
     r = _redis()
     if r is None:
         return None
     try:
         raw = r.get(key)
-        return json.loads(raw) if raw is not None else None
+        if raw is None:
+            return None
+        _local_set(key, raw, _LOCAL_TTL_ON_READ)
+        return orjson.loads(raw)
     except Exception as e:
         logger.warning("Redis GET error for key %s: %s", key, e)
         return None
@@ -50,10 +99,17 @@ def cache_get(key: str) -> Optional[Any]:
 
 def cache_set(key: str, value: Any, ttl: int = CACHE_7_DAYS) -> None:
     """Serialize value to JSON and store with TTL. Silently skips on error."""
+    try:
+        # Non-string dict keys (e.g. int ids) are stringified, as json.dumps did
+        raw = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    except Exception as e:
+        logger.warning("Cache serialize error for key %s: %s", key, e)
+        return
+    _local_set(key, raw, ttl)
     r = _redis()
     if r is None:
         return
     try:
-        r.set(key, json.dumps(value), ex=ttl)
+        r.set(key, raw, ex=ttl)
     except Exception as e:
         logger.warning("Redis SET error for key %s: %s", key, e)
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
@@ -47,11 +50,47 @@ try:
 except Exception as _e:
     print(f"[RAG] Seeding failed (non-fatal): {_e}")
 
+FBI_PREFETCH_INTERVAL = 24 * 60 * 60
+
+
+async def _fbi_prefetch_loop(states):
+    from app.services.crime_service import crime_service
+    # Rates are cached for 90 days, so a restart only fills in states that are missing
+    skip_cached = True
+    while True:
+        try:
+            await crime_service.prefetch_states(states, skip_cached=skip_cached)
+        except Exception as e:
+            print(f"[FBI] Prefetch failed (non-fatal): {e}")
+        skip_cached = False
+        await asyncio.sleep(FBI_PREFETCH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.http_client import close_async_client
+    from app.services.llm_service import close_groq_client
+
+    # Only worth it when results can be shared through Redis
+    states = settings.fbi_prefetch_states_list
+    prefetch = None
+    if states and settings.FBI_API_KEY and settings.REDIS_URL:
+        prefetch = asyncio.create_task(_fbi_prefetch_loop(states))
+    try:
+        yield
+    finally:
+        if prefetch:
+            prefetch.cancel()
+        await close_async_client()
+        await close_groq_client()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="MoveWise API",
     description="AI-powered relocation decision assistant",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.state.limiter = limiter
@@ -73,7 +112,6 @@ app.include_router(analysis.router)
 app.include_router(chat.router)
 app.include_router(stream.router)
 
-
 @app.get("/")
 def root():
     return {
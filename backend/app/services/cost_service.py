@@ -16,6 +16,11 @@ _RATIOS = {
 # Housing takes the remainder (0.35)
 _HOUSING_RATIO = 0.35
 
+# A ", ST" / ", ST 12345" address component
+_STATE_PART_RE = re.compile(r'\s*[A-Z]{2}\b')
+# A street component that starts with a house number ("123 Main St")
+_HOUSE_NUMBER_RE = re.compile(r'\s*\d')
+
 
 class CostService:
     """
@@ -65,13 +70,34 @@ class CostService:
             'VT': 3200, 'NH': 3100, 'ME': 2900, 'RI': 3100, 'DE': 3000,
         }
 
+        # Longest names first, so the leftmost hit is also the most specific one there
+        self._city_re = re.compile('|'.join(
+            re.escape(city) for city in sorted(self._city_costs, key=len, reverse=True)
+        ))
+
     # ── Lookup ─────────────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _locality(address: str) -> str:
+        """
+        The part of an address that can name a city: the components before the
+        ", ST" state component, minus a leading house-number street. Street names
+        such as "Houston St" or "Washington St" must not be priced as those cities.
+        """
+        parts = address.split(',')
+        state = next(
+            (i for i in range(1, len(parts)) if _STATE_PART_RE.match(parts[i])),
+            len(parts),
+        )
+        locality = parts[:state]
+        if _HOUSE_NUMBER_RE.match(locality[0]):
+            locality = locality[1:]
+        return ','.join(locality)
+
     def _total_monthly(self, address: str) -> float:
-        lower = address.lower()
-        for city, cost in self._city_costs.items():
-            if city in lower:
-                return float(cost)
+        city = self._city_re.search(self._locality(address).lower())
+        if city:
+            return float(self._city_costs[city.group()])
         match = re.search(r',\s*([A-Z]{2})\b', address)
         if match:
             code = match.group(1)
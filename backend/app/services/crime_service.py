@@ -1,9 +1,18 @@
 import re
 import math
 import asyncio
-import httpx
+import logging
+import random
+import orjson
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.geo import haversine_m
+from app.core.http_client import get_async_client
+from app.core.redis_cache import cache_get, cache_set, CACHE_7_DAYS, CACHE_30_DAYS, CACHE_90_DAYS
+
+logger = logging.getLogger(__name__)
 
 # Fixed hourly crime weight distribution (index = hour 0-23)
 # Based on FBI UCR patterns: higher weight = more crime
@@ -24,6 +33,33 @@ _CATEGORY_RATIOS = {
 # Local population assumed for a walkable 1–2 mile radius around the address
 _LOCAL_POP = 25_000
 
+# Upper bound on memoized nearest-agency picks before the memo is reset
+_MAX_AGENCY_PICKS = 4096
+
+# Within 10km, city police are preferred over county sheriffs, then anything else
+_AGENCY_TYPE_SCORES = {'City': 2, 'County': 1}
+
+# Cell size (degrees) of the per-state agency grid used by _nearest_agency
+_GRID_DEG = 0.1
+
+# FBI CDE throttles with 429 and sheds load with 5xx; retried with jittered exponential backoff
+_FBI_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_FBI_MAX_ATTEMPTS = 4
+# Statuses that mean "this agency has nothing to report", as opposed to a failed request
+_FBI_NO_DATA_STATUSES = frozenset({200, 404})
+_FBI_BACKOFF_BASE = 0.5  # seconds
+_FBI_BACKOFF_CAP = 8.0
+
+
+# FBI query windows depend only on today's year and month, so build them once per month
+@lru_cache(maxsize=4)
+def _windows_for(cy: int, cm: int) -> Tuple[Tuple[int, str, str], ...]:
+    from_month = max(1, cm - 2)   # 3 months inclusive: cm-2, cm-1, cm
+    return tuple(
+        (year, f"{from_month:02d}-{year}", f"{cm:02d}-{year}")
+        for year in (cy - 2, cy - 3)
+    )
+
 
 class CrimeService:
     """
@@ -68,20 +104,30 @@ class CrimeService:
             'MA': 2200, 'ME': 2200, 'CT': 2100, 'NH': 2000, 'VT': 2000,
         }
 
+        # The static fallback is deterministic per address, so memoize it per instance
+        self._static_rate = lru_cache(maxsize=1024)(self._static_rate)
+        # Schedules repeat across both locations and across users; results are immutable frozensets
+        self._parse_hour_range = lru_cache(maxsize=256)(self._parse_hour_range)
+
+        # Nearest-agency picks keyed by (state, agency count, lat, lng) rounded to ~100m
+        self._agency_picks: Dict[tuple, Optional[dict]] = {}
+        # Spatial grids over each state's agency list, keyed by (state, agency count)
+        self._agency_grids: Dict[tuple, Dict[Tuple[int, int], List[int]]] = {}
+
     # ── Helpers ────────────────────────────────────────────────────────────────
 
-    def _parse_hour_range(self, time_str: str) -> set:
+    def _parse_hour_range(self, time_str: str) -> frozenset:
         """Parse 'HH:MM - HH:MM' into a set of hours, handling midnight wrap-around."""
         try:
             start_str, end_str = time_str.split(' - ')
             start = int(start_str.split(':')[0])
             end   = int(end_str.split(':')[0])
             if start < end:
-                return set(range(start, end))
+                return frozenset(range(start, end))
             else:  # wraps midnight (e.g. 23:00 - 07:00)
-                return set(range(start, 24)) | set(range(0, end))
+                return frozenset(range(start, 24)) | frozenset(range(0, end))
         except Exception:
-            return set()
+            return frozenset()
 
     def _state_from_address(self, address: str) -> Optional[str]:
         """Extract a 2-letter US state code from a geocoded address string."""
@@ -94,15 +140,14 @@ class CrimeService:
         return None
 
     @staticmethod
-    def _year_window(year: int) -> tuple:
+    def _year_windows() -> Tuple[Tuple[int, str, str], ...]:
         """
-        Return (from_str, to_str) for a 3-month window within a specific year,
-        ending at the same month as today (mirrors current calendar position).
-        e.g. April 2026, year=2024 → from='02-2024', to='04-2024'
+        Return (year, from_str, to_str) for year-2 then year-3: a 3-month window in each
+        year ending at the same month as today (mirrors current calendar position).
+        e.g. April 2026 → ((2024, '02-2024', '04-2024'), (2023, '02-2023', '04-2023'))
         """
-        cm = datetime.now().month
-        from_month = max(1, cm - 2)   # 3 months inclusive: cm-2, cm-1, cm
-        return f"{from_month:02d}-{year}", f"{cm:02d}-{year}"
+        now = datetime.now()
+        return _windows_for(now.year, now.month)
 
     @staticmethod
     def _flatten_agency_list(raw: Any) -> List[dict]:
@@ -117,28 +162,14 @@ class CrimeService:
             return result
         return []
 
-    def _nearest_agency(self, agencies: List[dict], lat: float, lng: float) -> Optional[dict]:
+    @staticmethod
+    def _agency_columns(agencies: List[dict]) -> Dict[str, list]:
         """
-        Find the closest NIBRS-reporting agency to (lat, lng) using Haversine distance.
-        Within 10km, prefers City type over County. Beyond 10km, returns absolute nearest.
-        Skips agencies with no coordinates or is_nibrs=False.
+        Reduce a flat agency list to the NIBRS-reporting agencies that have coordinates,
+        stored column-wise: {'ori': [...], 'name': [...], 'type': [...], 'lat': [...], 'lng': [...]}.
+        Keeps the cached payload small and lets the nearest-agency scan zip over flat lists.
         """
-        def _haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-            R = 6_371_000
-            d_lat = (lat2 - lat1) * math.pi / 180
-            d_lng = (lng2 - lng1) * math.pi / 180
-            a = (math.sin(d_lat / 2) ** 2 +
-                 math.cos(lat1 * math.pi / 180) * math.cos(lat2 * math.pi / 180) *
-                 math.sin(d_lng / 2) ** 2)
-            return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        def _type_score(a: dict) -> int:
-            t = a.get('agency_type_name', '')
-            if t == 'City':   return 2
-            if t == 'County': return 1
-            return 0
-
-        candidates = []
+        cols: Dict[str, list] = {'ori': [], 'name': [], 'type': [], 'lat': [], 'lng': []}
         for a in agencies:
             if not a.get('is_nibrs'):
                 continue
@@ -146,20 +177,73 @@ class CrimeService:
             a_lng = a.get('longitude')
             if a_lat is None or a_lng is None:
                 continue
-            dist = _haversine(lat, lng, a_lat, a_lng)
-            candidates.append((dist, a))
+            cols['ori'].append(a['ori'])
+            cols['name'].append(a.get('agency_name', a['ori']))
+            cols['type'].append(a.get('agency_type_name', ''))
+            cols['lat'].append(a_lat)
+            cols['lng'].append(a_lng)
+        return cols
 
-        if not candidates:
-            return None
+    @staticmethod
+    def _agency_grid(agencies: Dict[str, list]) -> Dict[Tuple[int, int], List[int]]:
+        """Bucket agency indices into _GRID_DEG lat/lng cells for _nearest_agency."""
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, (a_lat, a_lng) in enumerate(zip(agencies['lat'], agencies['lng'])):
+            cell = (math.floor(a_lat / _GRID_DEG), math.floor(a_lng / _GRID_DEG))
+            grid.setdefault(cell, []).append(i)
+        return grid
+
+    def _nearest_agency(
+        self,
+        agencies: Dict[str, list],
+        lat: float,
+        lng: float,
+        grid: Optional[Dict[Tuple[int, int], List[int]]] = None,
+    ) -> Optional[dict]:
+        """
+        Find the closest NIBRS-reporting agency to (lat, lng) using Haversine distance.
+        Within 10km, prefers City type over County. Beyond 10km, returns absolute nearest.
+        *agencies* is the column-wise list built by _agency_columns. With a *grid* from
+        _agency_grid, only the cells covering the 10km radius are scanned; the full list
+        is scanned only when nothing lies within 10km.
+        """
+        a_lats, a_lngs, types = agencies['lat'], agencies['lng'], agencies['type']
+
+        def _scan(indices) -> tuple:
+            # Single pass: track the absolute nearest and the best (City > County, closest) within 10km
+            nearest = best_nearby = None
+            for i in indices:
+                d = haversine_m(lat, lng, a_lats[i], a_lngs[i])
+                if nearest is None or d < nearest[0]:
+                    nearest = (d, i)
+                if d <= 10_000:
+                    key = (-_AGENCY_TYPE_SCORES.get(types[i], 0), d)
+                    if best_nearby is None or key < best_nearby[0]:
+                        best_nearby = (key, i)
+            return nearest, best_nearby
+
+        best_nearby = None
+        if grid is not None:
+            # 10km < 0.1° of latitude; longitude cells narrow by cos(lat), so widen the x span
+            c_lat, c_lng = math.floor(lat / _GRID_DEG), math.floor(lng / _GRID_DEG)
+            span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.1))
+            local = [
+                i
+                for y in range(c_lat - 1, c_lat + 2)
+                for x in range(c_lng - span, c_lng + span + 1)
+                for i in grid.get((y, x), ())
+            ]
+            _, best_nearby = _scan(local)
 
-        nearby = [(d, a) for d, a in candidates if d <= 10_000]
-        if nearby:
-            # within 10km: prefer City > County, then closest
-            nearby.sort(key=lambda x: (-_type_score(x[1]), x[0]))
-            return nearby[0][1]
+        if best_nearby:
+            idx = best_nearby[1]
+        else:
+            nearest, best_nearby = _scan(range(len(a_lats)))
+            if nearest is None:
+                return None
+            idx = best_nearby[1] if best_nearby else nearest[1]
 
-        candidates.sort(key=lambda x: x[0])
-        return candidates[0][1]
+        return {'ori': agencies['ori'][idx], 'agency_name': agencies['name'][idx]}
 
     # ── FBI API ────────────────────────────────────────────────────────────────
 
@@ -193,117 +277,149 @@ class CrimeService:
         monthly_dict shape: {"02-2024": 3.16, "03-2024": 1.58, "04-2024": 7.89}
         """
         if not data or not isinstance(data, dict):
-            print(f"   [extract] {agency_name}: data missing or not a dict ({type(data)})")
+            logger.debug("[extract] %s: data missing or not a dict (%s)", agency_name, type(data))
             return None, {}
         rates_dict = data.get('offenses', {}).get('rates', {})
         agency_key = f"{agency_name} Offenses"
-        available_keys = list(rates_dict.keys())
         monthly_raw = rates_dict.get(agency_key)
         if not monthly_raw or not isinstance(monthly_raw, dict):
-            print(f"   [extract] {agency_name}: key '{agency_key}' not found. Available: {available_keys}")
+            logger.debug("[extract] %s: key '%s' not found. Available: %s", agency_name, agency_key, rates_dict.keys())
             return None, {}
         monthly = {k: v for k, v in monthly_raw.items()
                    if v is not None and isinstance(v, (int, float)) and v > 0}
         if not monthly:
-            print(f"   [extract] {agency_name}: monthly_raw has no valid numeric values: {monthly_raw}")
+            logger.debug("[extract] %s: monthly_raw has no valid numeric values: %s", agency_name, monthly_raw)
             return None, {}
         values = list(monthly.values())
         annualized = round(sum(values) * (12 / len(values)), 1)
-        print(f"   [extract] {agency_name}: annualized={annualized:.1f}/100k from {len(values)} months")
+        logger.debug("[extract] %s: annualized=%.1f/100k from %d months", agency_name, annualized, len(values))
         return annualized, monthly
 
-    async def _fetch_agency_list(self, state: str) -> Optional[List[dict]]:
-        """Fetch and cache all FBI reporting agencies for a state as a flat list."""
-        from app.core.redis_cache import cache_get, cache_set, CACHE_7_DAYS
-
-        cache_key = f"fbi:agency:{state.upper()}"
+    @staticmethod
+    def _retry_delay(resp, attempt: int) -> float:
+        """Seconds to wait before retry *attempt*: Retry-After if given, else full-jitter exponential."""
+        retry_after = resp.headers.get('Retry-After') if resp.headers else None
+        if retry_after:
+            try:
+                return min(float(retry_after), _FBI_BACKOFF_CAP)
+            except ValueError:
+                pass  # HTTP-date form — fall through to computed backoff
+        return random.uniform(0, min(_FBI_BACKOFF_CAP, _FBI_BACKOFF_BASE * 2 ** attempt))
+
+    async def _fbi_get(self, url: str, params: Dict[str, Any]):
+        """GET an FBI CDE endpoint, retrying 429/5xx with backoff. Returns the last response."""
+        client = get_async_client()
+        for attempt in range(_FBI_MAX_ATTEMPTS):
+            resp = await client.get(url, params=params)
+            if resp.status_code not in _FBI_RETRY_STATUSES or attempt == _FBI_MAX_ATTEMPTS - 1:
+                return resp
+            wait = self._retry_delay(resp, attempt)
+            logger.debug("FBI HTTP %d: retry %d/%d in %.1fs", resp.status_code, attempt + 1, _FBI_MAX_ATTEMPTS - 1, wait)
+            await asyncio.sleep(wait)
+
+    async def _fetch_agency_list(self, state: str) -> Optional[Dict[str, list]]:
+        """Fetch and cache the NIBRS agencies for a state in column-wise form (see _agency_columns)."""
+        cache_key = f"fbi:agencies:{state.upper()}"
         cached = cache_get(cache_key)
         if cached:
             return cached
         if not self.api_key:
             return None
-        for attempt in range(3):
-            try:
-                if attempt > 0:
-                    wait = attempt * 2
-                    print(f"   FBI agency list {state}: 503 retry {attempt}/2 (wait {wait}s)")
-                    await asyncio.sleep(wait)
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    resp = await client.get(
-                        f"{self.fbi_api_base}/agency/byStateAbbr/{state.upper()}",
-                        params={'API_KEY': self.api_key}
-                    )
-                if resp.status_code == 503:
-                    continue
-                if resp.status_code != 200:
-                    print(f"   WARNING FBI agency list {state}: HTTP {resp.status_code}")
-                    return None
-                agencies = self._flatten_agency_list(resp.json())
-                if agencies:
-                    cache_set(cache_key, agencies, ttl=CACHE_7_DAYS)
-                    print(f"   FBI agency list {state}: {len(agencies)} agencies cached")
-                return agencies or None
-            except Exception as e:
-                print(f"   WARNING FBI agency list error ({state}): {e}")
+        try:
+            resp = await self._fbi_get(
+                f"{self.fbi_api_base}/agency/byStateAbbr/{state.upper()}",
+                {'API_KEY': self.api_key},
+            )
+            if resp.status_code != 200:
+                logger.warning("FBI agency list %s: HTTP %d", state, resp.status_code)
                 return None
-        print(f"   WARNING FBI agency list {state}: all retries failed (503)")
-        return None
+            agencies = self._agency_columns(self._flatten_agency_list(orjson.loads(resp.content)))
+            if agencies['ori']:
+                cache_set(cache_key, agencies, ttl=CACHE_30_DAYS)
+                logger.debug("FBI agency list %s: %d agencies cached", state, len(agencies['ori']))
+                return agencies
+            return None
+        except Exception as e:
+            logger.warning("FBI agency list error (%s): %s", state, e)
+            return None
 
     async def _fetch_agency_rate(self, state: str, lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """
         Find the nearest NIBRS agency to (lat, lng) and return its annualized crime rates.
         Queries V, P, LAR, BUR offense categories. Returns None on any failure → caller falls back to state.
         """
-        from app.core.redis_cache import cache_get, cache_set, CACHE_7_DAYS
-
         agencies = await self._fetch_agency_list(state)
         if not agencies:
             return None
 
-        agency = self._nearest_agency(agencies, lat, lng)
+        pick_key = (state.upper(), len(agencies['ori']), round(lat, 3), round(lng, 3))
+        if pick_key in self._agency_picks:
+            agency = self._agency_picks[pick_key]
+        else:
+            grid_key = (state.upper(), len(agencies['ori']))
+            grid = self._agency_grids.get(grid_key)
+            if grid is None:
+                grid = self._agency_grids[grid_key] = self._agency_grid(agencies)
+            agency = self._nearest_agency(agencies, lat, lng, grid)
+            if len(self._agency_picks) >= _MAX_AGENCY_PICKS:
+                self._agency_picks.clear()
+            self._agency_picks[pick_key] = agency
         if not agency:
-            print(f"   FBI agency: no nearby NIBRS agency for ({lat:.3f},{lng:.3f})")
+            logger.debug("FBI agency: no nearby NIBRS agency for (%.3f,%.3f)", lat, lng)
             return None
 
         ori  = agency['ori']
         name = agency['agency_name']
-        print(f"   FBI agency selected: {name} (ORI={ori})")
+        logger.debug("FBI agency selected: %s (ORI=%s)", name, ori)
 
         # Cache by ORI so all analyses near the same agency share one fetch
         ori_cache_key = f"fbi:agency_rate:{ori}"
         cached = cache_get(ori_cache_key)
         if cached:
-            print(f"   CACHE HIT agency rate {name} (ORI={ori})")
+            logger.debug("CACHE HIT agency rate %s (ORI=%s)", name, ori)
             return cached
 
-        cy = datetime.now().year
-        for year in [cy - 2, cy - 3]:
-            from_str, to_str = self._year_window(year)
-            params: Dict[str, Any] = {'from': from_str, 'to': to_str, 'API_KEY': self.api_key}
-            try:
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    v_resp = await client.get(f"{self.fbi_api_base}/summarized/agency/{ori}/V",   params=params)
-                    p_resp = await client.get(f"{self.fbi_api_base}/summarized/agency/{ori}/P",   params=params)
-                    l_resp = await client.get(f"{self.fbi_api_base}/summarized/agency/{ori}/LAR", params=params)
-                    d_resp = await client.get(f"{self.fbi_api_base}/summarized/agency/{ori}/BUR", params=params)
+        # Agencies that reported nothing for either year are remembered so we skip them
+        no_data_key = f"fbi:agency_nodata:{ori}"
+        if cache_get(no_data_key):
+            logger.debug("FBI agency %s: known to have no data, falling back to state", name)
+            return None
 
-                print(f"   FBI agency {name} {year}: V={v_resp.status_code} P={p_resp.status_code} LAR={l_resp.status_code} BUR={d_resp.status_code}")
+        def _rate_monthly(resp, label: str) -> tuple:
+            if resp.status_code != 200:
+                logger.debug("[agency] %s %s: HTTP %d — %.200s", name, label, resp.status_code, resp.text)
+                return None, {}
+            return self._extract_agency_rate(orjson.loads(resp.content), name)
 
-                def _rate_monthly(resp, label: str) -> tuple:
-                    if resp.status_code != 200:
-                        print(f"   [agency] {name} {label}: HTTP {resp.status_code} — {resp.text[:200]}")
-                        return None, {}
-                    return self._extract_agency_rate(resp.json(), name)
+        had_error = False
+        for year, from_str, to_str in self._year_windows():
+            params: Dict[str, Any] = {'from': from_str, 'to': to_str, 'API_KEY': self.api_key}
+            try:
+                v_resp, p_resp = await asyncio.gather(
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/agency/{ori}/V", params),
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/agency/{ori}/P", params),
+                )
+                logger.debug("FBI agency %s %d: V=%d P=%d", name, year, v_resp.status_code, p_resp.status_code)
+                # A 429/5xx left over after retries is an outage, not an empty agency
+                if any(r.status_code not in _FBI_NO_DATA_STATUSES for r in (v_resp, p_resp)):
+                    had_error = True
 
                 v_rate, v_monthly = _rate_monthly(v_resp, 'V')
                 p_rate, p_monthly = _rate_monthly(p_resp, 'P')
-                l_rate, l_monthly = _rate_monthly(l_resp, 'LAR')
-                d_rate, d_monthly = _rate_monthly(d_resp, 'BUR')
 
+                # Larceny/burglary breakdowns are only worth fetching once V or P has data
                 if v_rate is None and p_rate is None:
-                    print(f"   WARNING FBI agency {name} {year}: no usable rates (V={v_rate}, P={p_rate}), trying year-3")
+                    logger.debug("FBI agency %s %d: no usable rates, trying year-3", name, year)
                     continue
 
+                l_resp, d_resp = await asyncio.gather(
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/agency/{ori}/LAR", params),
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/agency/{ori}/BUR", params),
+                )
+
+                l_rate, l_monthly = _rate_monthly(l_resp, 'LAR')
+                d_rate, d_monthly = _rate_monthly(d_resp, 'BUR')
+
                 v     = v_rate or 0.0
                 p     = p_rate or round(v * 3.5, 1)
                 total = round(v + p, 1)
@@ -324,15 +440,19 @@ class CrimeService:
                         'burglary': d_monthly,
                     },
                 }
-                cache_set(ori_cache_key, result, ttl=CACHE_7_DAYS)
-                print(f"   OK FBI agency {name} {year} ({from_str}→{to_str}): {v:.0f}+{p:.0f}={total:.0f}/100k")
+                cache_set(ori_cache_key, result, ttl=CACHE_90_DAYS)
+                logger.debug("FBI agency %s %d (%s→%s): %.0f+%.0f=%.0f/100k", name, year, from_str, to_str, v, p, total)
                 return result
 
             except Exception as e:
-                print(f"   WARNING FBI agency error ({ori} {year}): {e}")
+                had_error = True
+                logger.warning("FBI agency error (%s %d): %s", ori, year, e)
                 continue
 
-        print(f"   FBI agency {name}: no data for year-2 or year-3, falling back to state")
+        # Only remember a clean "no data" answer — transient errors should be retried next time
+        if not had_error:
+            cache_set(no_data_key, True, ttl=CACHE_7_DAYS)
+        logger.debug("FBI agency %s: no data for year-2 or year-3, falling back to state", name)
         return None
 
     async def _fetch_fbi_rates(self, address: str) -> Optional[Dict[str, Any]]:
@@ -342,31 +462,28 @@ class CrimeService:
         """
         state = self._state_from_address(address)
         if not state:
-            print(f"   WARNING FBI API: could not extract state from '{address}'")
+            logger.warning("FBI API: could not extract state from '%s'", address)
             return None
 
-        cy = datetime.now().year
-        for year in [cy - 2, cy - 3]:
-            from_str, to_str = self._year_window(year)
+        for year, from_str, to_str in self._year_windows():
             params: Dict[str, Any] = {'from': from_str, 'to': to_str}
             if self.api_key:
                 params['api_key'] = self.api_key
 
             try:
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    v_resp, p_resp, l_resp, d_resp = await asyncio.gather(
-                        client.get(f"{self.fbi_api_base}/summarized/state/{state}/V", params=params),
-                        client.get(f"{self.fbi_api_base}/summarized/state/{state}/P", params=params),
-                        client.get(f"{self.fbi_api_base}/summarized/state/{state}/larceny", params=params),
-                        client.get(f"{self.fbi_api_base}/summarized/state/{state}/burglary", params=params),
-                    )
+                v_resp, p_resp, l_resp, d_resp = await asyncio.gather(
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/state/{state}/V", params),
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/state/{state}/P", params),
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/state/{state}/larceny", params),
+                    self._fbi_get(f"{self.fbi_api_base}/summarized/state/{state}/burglary", params),
+                )
 
-                print(f"   FBI API {state} {year} ({from_str}→{to_str}): V={v_resp.status_code} P={p_resp.status_code}")
+                logger.debug("FBI API %s %d (%s→%s): V=%d P=%d", state, year, from_str, to_str, v_resp.status_code, p_resp.status_code)
 
-                v_data = v_resp.json() if v_resp.status_code == 200 else None
-                p_data = p_resp.json() if p_resp.status_code == 200 else None
-                l_data = l_resp.json() if l_resp.status_code == 200 else None
-                d_data = d_resp.json() if d_resp.status_code == 200 else None
+                v_data = orjson.loads(v_resp.content) if v_resp.status_code == 200 else None
+                p_data = orjson.loads(p_resp.content) if p_resp.status_code == 200 else None
+                l_data = orjson.loads(l_resp.content) if l_resp.status_code == 200 else None
+                d_data = orjson.loads(d_resp.content) if d_resp.status_code == 200 else None
 
                 violent_rate  = self._extract_rate(v_data)
                 property_rate = self._extract_rate(p_data)
@@ -374,7 +491,7 @@ class CrimeService:
                 burglary_rate = self._extract_rate(d_data)
 
                 if violent_rate is None and property_rate is None:
-                    print(f"   WARNING FBI API: no data for {state} {year}, trying year-3")
+                    logger.debug("FBI API: no data for %s %d, trying year-3", state, year)
                     continue
 
                 v = violent_rate or 0.0
@@ -382,10 +499,8 @@ class CrimeService:
                 total = round(v + p, 1)
 
                 if total > 0:
-                    cats = []
-                    if larceny_rate:  cats.append(f"larceny={larceny_rate:.0f}")
-                    if burglary_rate: cats.append(f"burglary={burglary_rate:.0f}")
-                    print(f"   OK FBI API {state} {year}: {v:.0f}+{p:.0f}={total:.0f}/100k ({', '.join(cats) or 'no category data'})")
+                    logger.debug("FBI API %s %d: %.0f+%.0f=%.0f/100k (larceny=%s, burglary=%s)",
+                                 state, year, v, p, total, larceny_rate, burglary_rate)
                     return {
                         'total':    total,
                         'violent':  v,
@@ -397,7 +512,7 @@ class CrimeService:
                     }
 
             except Exception as e:
-                print(f"   WARNING FBI API error ({state} {year}): {e}")
+                logger.warning("FBI API error (%s %d): %s", state, year, e)
                 continue
 
         return None
@@ -418,8 +533,6 @@ class CrimeService:
     async def _get_rates(self, address: str, lat: Optional[float] = None, lng: Optional[float] = None) -> Dict[str, Any]:
         """Return a dict with total rate, source, and per-category rates.
         Priority: agency-level (if coords + API key) → state-level → static fallback."""
-        from app.core.redis_cache import cache_get, cache_set, CACHE_7_DAYS
-
         state = self._state_from_address(address)
 
         # ── 1. Agency-level rate (most accurate) ──────────────────────────────
@@ -427,20 +540,20 @@ class CrimeService:
             agency_result = await self._fetch_agency_rate(state, lat, lng)
             if agency_result:
                 return agency_result
-            print(f"   FBI agency fallback → state-level for ({lat:.3f},{lng:.3f})")
+            logger.debug("FBI agency fallback → state-level for (%.3f,%.3f)", lat, lng)
 
         # ── 2. State-level rate ────────────────────────────────────────────────
         if state:
             cached = cache_get(self._cache_key(state))
             if cached:
-                print(f"   CACHE HIT FBI {state}")
+                logger.debug("CACHE HIT FBI %s", state)
                 return cached
 
         result = await self._fetch_fbi_rates(address)
         if result:
             if state:
-                cache_set(self._cache_key(state), result, ttl=CACHE_7_DAYS)
-                print(f"   CACHE SET FBI {state} (7 days)")
+                cache_set(self._cache_key(state), result, ttl=CACHE_90_DAYS)
+                logger.debug("CACHE SET FBI %s (90 days)", state)
             return result
 
         # ── 3. Static fallback ─────────────────────────────────────────────────
@@ -559,6 +672,29 @@ class CrimeService:
     def _cache_key(state: str) -> str:
         return f"fbi:state:{state.upper()}"
 
+    async def prefetch_states(self, states: List[str], skip_cached: bool = False) -> int:
+        """
+        Warm the Redis cache for each state: NIBRS agency list + state-level rates.
+        States are fetched one at a time to avoid FBI 503 bursts. With skip_cached,
+        states whose rates are still cached are left alone. Returns the number
+        of states whose rates were refreshed.
+        """
+        refreshed = 0
+        for state in states:
+            state = state.upper().strip()
+            if not state:
+                continue
+            if skip_cached and cache_get(self._cache_key(state)):
+                continue
+            if self.api_key:
+                await self._fetch_agency_list(state)
+            result = await self._fetch_fbi_rates(f"City, {state} 00000, USA")
+            if result:
+                cache_set(self._cache_key(state), result, ttl=CACHE_90_DAYS)
+                refreshed += 1
+        logger.info("FBI prefetch: refreshed %d/%d states", refreshed, len(states))
+        return refreshed
+
     # ── Public API ─────────────────────────────────────────────────────────────
 
     async def compare_crime_data(
@@ -1,51 +1,20 @@
-from groq import Groq
+import asyncio
+import hashlib
+import logging
+import re
+import weakref
+from collections import deque
+
+import httpx
+import orjson
+from groq import AsyncGroq
 from app.core.config import settings
-from typing import Dict, Any, List
+from app.core.redis_cache import cache_get, cache_set
+from typing import Dict, Any, List, AsyncIterator
 
+logger = logging.getLogger(__name__)
 
-class LLMService:
-    def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
-    
-    def generate_lifestyle_analysis(
-        self,
-        current_address: str,
-        destination_address: str,
-        crime_data: Dict[str, Any],
-        amenities_data: Dict[str, Any],
-        cost_data: Dict[str, Any],
-        noise_data: Dict[str, Any],
-        commute_data: Dict[str, Any],
-        user_preferences: Dict[str, Any] = None,
-        overall_scores: Dict[str, Any] = None
-    ) -> Dict[str, Any]:
-        """
-        Generate comprehensive lifestyle analysis using real data from:
-        - FBI Crime Data Explorer API (crime data)
-        - HowLoud SoundScore / Google Places + OpenStreetMap (noise modeling)
-        - Static 2024 cost of living data (cost)
-        """
-        
-        # Build context prompt with real data
-        prompt = self._build_analysis_prompt(
-            current_address,
-            destination_address,
-            crime_data,
-            amenities_data,
-            cost_data,
-            noise_data,
-            commute_data,
-            user_preferences,
-            overall_scores
-        )
-        
-        try:
-            # Call Groq API
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a relocation expert helping people make informed decisions about moving. 
+_SYSTEM_PROMPT = """You are a relocation expert helping people make informed decisions about moving. 
 
 You have access to REAL data from authoritative sources:
 - FBI Crime Data Explorer: state-level crime rates with temporal analysis
@@ -53,236 +22,275 @@ You have access to REAL data from authoritative sources:
 - Static 2024 cost of living data: city and state-level estimates
 
 Provide clear, data-driven insights with a friendly, personalized tone. Focus on actionable recommendations based on the user's specific schedule, preferences, and the real data provided."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model="llama-3.3-70b-versatile",
-                temperature=0.9,
-                max_tokens=2500
-            )
-            
-            analysis_text = chat_completion.choices[0].message.content
-            
-            # Extract structured insights
-            return self._parse_llm_response(analysis_text)
-            
-        except Exception as e:
-            print(f"LLM Error: {e}")
-            return {
-                "overview_summary": "Analysis temporarily unavailable. Please check the detailed data tabs for comprehensive information.",
-                "lifestyle_changes": [],
-                "ai_insights": str(e),
-                "action_steps": []
-            }
-    
-    def _build_analysis_prompt(
-        self,
-        current_address: str,
-        destination_address: str,
-        crime_data: Dict[str, Any],
-        amenities_data: Dict[str, Any],
-        cost_data: Dict[str, Any],
-        noise_data: Dict[str, Any],
-        commute_data: Dict[str, Any],
-        user_preferences: Dict[str, Any] = None,
-        overall_scores: Dict[str, Any] = None
-    ) -> str:
-        """Build comprehensive prompt with real data"""
-        
-        # Extract data safely
-        current_crime = crime_data.get('current', {})
-        dest_crime = crime_data.get('destination', {})
-        crime_comp = crime_data.get('comparison', {})
-        
-        current_noise = noise_data.get('current', {})
-        dest_noise = noise_data.get('destination', {})
-        noise_comp = noise_data.get('comparison', {})
-        
-        current_cost = cost_data.get('current', {})
-        dest_cost = cost_data.get('destination', {})
-        cost_comp = cost_data.get('comparison', {})
-        
-        dest_amenities = amenities_data.get('destination', {})
-        
-        prompt = f"""Analyze the lifestyle impact of moving from {current_address} to {destination_address}.
 
-═══════════════════════════════════════════════════════════════
-REAL CRIME DATA (FBI Crime Data Explorer - State-level, 2025)
-═══════════════════════════════════════════════════════════════
+_LLM_MODEL = "llama-3.3-70b-versatile"
+
+# One Groq client (and keep-alive pool) per event loop, shared by every LLMService call
+_GROQ_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0)
+_GROQ_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# The SDK itself retries 408/409/429/5xx and connection errors with jittered exponential backoff
+_GROQ_MAX_RETRIES = 2
+# Hard ceiling on one completion, retries included — past this the analysis ships the fallback text
+_LLM_TIMEOUT = 25.0
+_groq_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = weakref.WeakKeyDictionary()
+_RESPONSE_CACHE_TTL = 24 * 60 * 60  # seconds — repeat loads / retries / re-runs of the same analysis
+
+
+def get_groq_client() -> AsyncGroq:
+    """Return the AsyncGroq client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _groq_clients.get(loop)
+    if client is None:
+        http_client = httpx.AsyncClient(limits=_GROQ_LIMITS, timeout=_GROQ_TIMEOUT)
+        client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            http_client=http_client,
+            max_retries=_GROQ_MAX_RETRIES,
+        )
+        _groq_clients[loop] = client
+    return client
 
-CURRENT LOCATION:
-• Total Crimes: {current_crime.get('total_crimes', 0)} crimes in 30 days
-• Daily Average: {current_crime.get('daily_average', 0)} crimes/day
-• Safety Score: {current_crime.get('safety_score', 0)}/100
-• Crime Rate: {current_crime.get('crime_rate_per_100k', 0)}/100k population
 
-Crime Types:
-• Violent: {current_crime.get('categories', {}).get('violent', 0)}
-• Larceny: {current_crime.get('categories', {}).get('larceny', 0)}
-• Burglary: {current_crime.get('categories', {}).get('burglary', 0)}
-• Other Property: {current_crime.get('categories', {}).get('other_property', 0)}
+async def close_groq_client() -> None:
+    """Close the Groq client for the running event loop, if one was created."""
+    client = _groq_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
 
-Temporal Analysis:
-• During Sleep Hours (10PM-6AM): {current_crime.get('temporal_analysis', {}).get('crimes_during_sleep_hours', 0)} crimes
-• During Work Hours (9AM-5PM): {current_crime.get('temporal_analysis', {}).get('crimes_during_work_hours', 0)} crimes
-• During Commute: {current_crime.get('temporal_analysis', {}).get('crimes_during_commute', 0)} crimes
-• Peak Crime Hours: {current_crime.get('temporal_analysis', {}).get('peak_hours', [])}
 
-DESTINATION LOCATION:
-• Total Crimes: {dest_crime.get('total_crimes', 0)} crimes in 30 days
-• Daily Average: {dest_crime.get('daily_average', 0)} crimes/day
-• Safety Score: {dest_crime.get('safety_score', 0)}/100
-• Crime Rate: {dest_crime.get('crime_rate_per_100k', 0)}/100k population
+def _normalize(value: Any) -> Any:
+    """Round floats to 2dp so near-identical payloads share a cache entry."""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def _response_cache_key(*inputs: Any) -> str:
+    """Cache key over the raw analysis inputs, so a hit skips prompt assembly too."""
+    payload = orjson.dumps(
+        [_SUMMARY_MODEL, _LLM_MODEL, _normalize(list(inputs))],
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        default=str,
+    )
+    return f"llm:v1:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
+# ── Prompt templates ──────────────────────────────────────────────────────────
+# Parsed once at import; _build_analysis_prompt only fills them via str.format.
+
+_CRIME_LOCATION_TMPL = """• Total Crimes: {total_crimes} crimes in 30 days
+• Daily Average: {daily_average} crimes/day
+• Safety Score: {safety_score}/100
+• Crime Rate: {crime_rate_per_100k}/100k population
 
 Crime Types:
-• Violent: {dest_crime.get('categories', {}).get('violent', 0)}
-• Larceny: {dest_crime.get('categories', {}).get('larceny', 0)}
-• Burglary: {dest_crime.get('categories', {}).get('burglary', 0)}
-• Other Property: {dest_crime.get('categories', {}).get('other_property', 0)}
+• Violent: {violent}
+• Larceny: {larceny}
+• Burglary: {burglary}
+• Other Property: {other_property}
 
 Temporal Analysis:
-• During Sleep Hours (10PM-6AM): {dest_crime.get('temporal_analysis', {}).get('crimes_during_sleep_hours', 0)} crimes
-• During Work Hours (9AM-5PM): {dest_crime.get('temporal_analysis', {}).get('crimes_during_work_hours', 0)} crimes
-• During Commute: {dest_crime.get('temporal_analysis', {}).get('crimes_during_commute', 0)} crimes
-• Peak Crime Hours: {dest_crime.get('temporal_analysis', {}).get('peak_hours', [])}
-
-COMPARISON:
-• Crime Difference: {crime_comp.get('crime_difference', 0):+d} crimes/month
-• Safety Score Change: {crime_comp.get('score_difference', 0):+.1f} points
-• Assessment: {crime_comp.get('recommendation', 'Review crime patterns')}
+• During Sleep Hours (10PM-6AM): {crimes_during_sleep_hours} crimes
+• During Work Hours (9AM-5PM): {crimes_during_work_hours} crimes
+• During Commute: {crimes_during_commute} crimes
+• Peak Crime Hours: {peak_hours}
+"""
 
-═══════════════════════════════════════════════════════════════
-REAL NOISE DATA (HowLoud SoundScore / Google Places + OpenStreetMap)
-═══════════════════════════════════════════════════════════════
+_NOISE_LOCATION_TMPL = """• Estimated Noise: {estimated_db:.1f} dB
+• Category: {noise_category}
+• Noise Score: {noise_score}/100
+• Description: {description}
+"""
 
-CURRENT LOCATION:
-• Estimated Noise: {current_noise.get('estimated_db', 0):.1f} dB
-• Category: {current_noise.get('noise_category', 'Unknown')}
-• Noise Score: {current_noise.get('noise_score', 0)}/100
-• Description: {current_noise.get('description', '')}
+_COST_LOCATION_TMPL = """• Total Monthly: ${total_monthly:,.2f}
+• Total Annual: ${total_annual:,.2f}
+• Affordability Score: {affordability_score}/100
+• Cost Index: {cost_index}
 
-DESTINATION LOCATION:
-• Estimated Noise: {dest_noise.get('estimated_db', 0):.1f} dB
-• Category: {dest_noise.get('noise_category', 'Unknown')}
-• Noise Score: {dest_noise.get('noise_score', 0)}/100
-• Description: {dest_noise.get('description', '')}
+Breakdown:
+• Housing: ${monthly_rent:,.2f}/month
+• Utilities: ${utilities:,.2f}
+• Groceries: ${groceries:,.2f}
+• Transportation: ${transportation:,.2f}
+• Healthcare: ${healthcare:,.2f}
+• Entertainment: ${entertainment:,.2f}
+"""
 
-COMPARISON:
-• dB Difference: {noise_comp.get('db_difference', 0):+.1f} dB
-• Description: {noise_comp.get('recommendation', 'Similar')}
-• User Preference: {user_preferences.get('noise_preference', 'moderate') if user_preferences else 'moderate'}
-• Match Quality: {noise_comp.get('preference_match', {}).get('quality', 'fair')}
-• Recommendation: {noise_comp.get('recommendation', 'Review noise levels')}
+_INTRO_TMPL = "Analyze the lifestyle impact of moving from {current_address} to {destination_address}.\n"
 
-═══════════════════════════════════════════════════════════════
-REAL COST DATA (Static 2024 Cost of Living Estimates)
-═══════════════════════════════════════════════════════════════
+# Each section opens with one markdown header instead of ═══ banners (far fewer input
+# tokens); headers are baked into the templates so a section is a single format call
+_CRIME_SECTION_TMPL = """
+## REAL CRIME DATA (FBI Crime Data Explorer - State-level, 2025)
 
 CURRENT LOCATION:
-• Total Monthly: ${current_cost.get('total_monthly', 0):,.2f}
-• Total Annual: ${current_cost.get('total_annual', 0):,.2f}
-• Affordability Score: {current_cost.get('affordability_score', 0)}/100
-• Cost Index: {current_cost.get('cost_index', 1.0)}
+{current}
+DESTINATION LOCATION:
+{destination}
+COMPARISON:
+• Crime Difference: {crime_difference:+d} crimes/month
+• Safety Score Change: {score_difference:+.1f} points
+• Assessment: {recommendation}
+"""
 
-Breakdown:
-• Housing: ${current_cost.get('housing', {}).get('monthly_rent', 0):,.2f}/month
-• Utilities: ${current_cost.get('expenses', {}).get('utilities', 0):,.2f}
-• Groceries: ${current_cost.get('expenses', {}).get('groceries', 0):,.2f}
-• Transportation: ${current_cost.get('expenses', {}).get('transportation', 0):,.2f}
-• Healthcare: ${current_cost.get('expenses', {}).get('healthcare', 0):,.2f}
-• Entertainment: ${current_cost.get('expenses', {}).get('entertainment', 0):,.2f}
+_NOISE_SECTION_TMPL = """
+## REAL NOISE DATA (HowLoud SoundScore / Google Places + OpenStreetMap)
 
+CURRENT LOCATION:
+{current}
 DESTINATION LOCATION:
-• Total Monthly: ${dest_cost.get('total_monthly', 0):,.2f}
-• Total Annual: ${dest_cost.get('total_annual', 0):,.2f}
-• Affordability Score: {dest_cost.get('affordability_score', 0)}/100
-• Cost Index: {dest_cost.get('cost_index', 1.0)}
+{destination}
+COMPARISON:
+• dB Difference: {db_difference:+.1f} dB
+• Description: {description}
+• User Preference: {noise_preference}
+• Match Quality: {match_quality}
+• Recommendation: {recommendation}
+"""
 
-Breakdown:
-• Housing: ${dest_cost.get('housing', {}).get('monthly_rent', 0):,.2f}/month
-• Utilities: ${dest_cost.get('expenses', {}).get('utilities', 0):,.2f}
-• Groceries: ${dest_cost.get('expenses', {}).get('groceries', 0):,.2f}
-• Transportation: ${dest_cost.get('expenses', {}).get('transportation', 0):,.2f}
-• Healthcare: ${dest_cost.get('expenses', {}).get('healthcare', 0):,.2f}
-• Entertainment: ${dest_cost.get('expenses', {}).get('entertainment', 0):,.2f}
+_COST_SECTION_TMPL = """
+## REAL COST DATA (Static 2024 Cost of Living Estimates)
 
+CURRENT LOCATION:
+{current}
+DESTINATION LOCATION:
+{destination}
 COMPARISON:
-• Monthly Difference: ${cost_comp.get('monthly_difference', 0):+,.2f}
-• Annual Difference: ${cost_comp.get('annual_difference', 0):+,.2f}
-• Percent Change: {cost_comp.get('percent_change', 0):+.1f}%
-• Assessment: {cost_comp.get('recommendation', 'Review costs')}
+• Monthly Difference: ${monthly_difference:+,.2f}
+• Annual Difference: ${annual_difference:+,.2f}
+• Percent Change: {percent_change:+.1f}%
+• Assessment: {recommendation}
+"""
 
-═══════════════════════════════════════════════════════════════
-AMENITIES & LIFESTYLE
-═══════════════════════════════════════════════════════════════
+_AMENITIES_TMPL = """
+## AMENITIES & LIFESTYLE
 
 Destination Amenities:
-• Total Count: {dest_amenities.get('total_count', 0)}
+• Total Count: {total_count}
 
 By Type:
 """
-        
-        # Add amenity breakdown
-        for amenity_type, count in dest_amenities.get('by_type', {}).items():
-            prompt += f"• {amenity_type.title()}: {count}\n"
-        
-        prompt += f"""
-═══════════════════════════════════════════════════════════════
-COMMUTE INFORMATION
-═══════════════════════════════════════════════════════════════
-
-• Duration: {commute_data.get('duration_minutes', 0)} minutes
-• Distance: {commute_data.get('distance', 'Unknown')}
-• Method: {commute_data.get('method', 'driving').title()}
+
+_AMENITY_ROW_TMPL = "• {name}: {count}\n"
+
+_COMMUTE_TMPL = """
+## COMMUTE INFORMATION
+
+• Duration: {duration_minutes} minutes
+• Distance: {distance}
+• Method: {method}
 """
 
-        if user_preferences:
-            prompt += f"""
-═══════════════════════════════════════════════════════════════
-USER PREFERENCES & SCHEDULE
-═══════════════════════════════════════════════════════════════
-
-• Work Schedule: {user_preferences.get('work_hours', 'Not specified')}
-• Sleep Schedule: {user_preferences.get('sleep_hours', 'Not specified')}
-• Noise Tolerance: {user_preferences.get('noise_preference', 'moderate').title()}
-• Hobbies/Interests: {', '.join(user_preferences.get('hobbies', ['None specified']))}
+_PREFERENCES_TMPL = """
+## USER PREFERENCES & SCHEDULE
+
+• Work Schedule: {work_hours}
+• Sleep Schedule: {sleep_hours}
+• Noise Tolerance: {noise_tolerance}
+• Hobbies/Interests: {hobbies}
 """
 
-        if overall_scores:
-            prompt += f"""
-═══════════════════════════════════════════════════════════════
-OVERALL SCORES (Weighted Composite)
-═══════════════════════════════════════════════════════════════
+_SCORES_TMPL = """
+## OVERALL SCORES (Weighted Composite)
 
-Overall Score: {overall_scores.get('overall_score', 0)}/100 (Grade: {overall_scores.get('grade', 'N/A')})
+Overall Score: {overall_score}/100 (Grade: {grade})
 
 Component Scores:
-• Safety: {overall_scores.get('component_scores', {}).get('safety', {}).get('score', 0)}/100 (30% weight)
-• Affordability: {overall_scores.get('component_scores', {}).get('affordability', {}).get('score', 0)}/100 (25% weight)
-• Environment: {overall_scores.get('component_scores', {}).get('environment', {}).get('score', 0)}/100 (20% weight)
-• Lifestyle: {overall_scores.get('component_scores', {}).get('lifestyle', {}).get('score', 0)}/100 (15% weight)
-• Convenience: {overall_scores.get('component_scores', {}).get('convenience', {}).get('score', 0)}/100 (10% weight)
-
-Strengths: {', '.join(overall_scores.get('strengths', []))}
-Concerns: {', '.join([c['area'] for c in overall_scores.get('concerns', [])])}
+• Safety: {safety}/100 (30% weight)
+• Affordability: {affordability}/100 (25% weight)
+• Environment: {environment}/100 (20% weight)
+• Lifestyle: {lifestyle}/100 (15% weight)
+• Convenience: {convenience}/100 (10% weight)
+
+Strengths: {strengths}
+Concerns: {concerns}
 """
 
-        prompt += """
-═══════════════════════════════════════════════════════════════
-INSTRUCTIONS
-═══════════════════════════════════════════════════════════════
-
-Based on this REAL DATA, provide:
-
-1. OVERVIEW (2-3 sentences)
+# Template field → (dotted path into the flattened source dict, default when missing or None)
+_CRIME_FIELDS = {
+    "total_crimes": ("total_crimes", 0),
+    "daily_average": ("daily_average", 0),
+    "safety_score": ("safety_score", 0),
+    "crime_rate_per_100k": ("crime_rate_per_100k", 0),
+    "violent": ("categories.violent", 0),
+    "larceny": ("categories.larceny", 0),
+    "burglary": ("categories.burglary", 0),
+    "other_property": ("categories.other_property", 0),
+    "crimes_during_sleep_hours": ("temporal_analysis.crimes_during_sleep_hours", 0),
+    "crimes_during_work_hours": ("temporal_analysis.crimes_during_work_hours", 0),
+    "crimes_during_commute": ("temporal_analysis.crimes_during_commute", 0),
+    "peak_hours": ("temporal_analysis.peak_hours", []),
+}
+
+_NOISE_FIELDS = {
+    "estimated_db": ("estimated_db", 0),
+    "noise_category": ("noise_category", "Unknown"),
+    "noise_score": ("noise_score", 0),
+    "description": ("description", ""),
+}
+
+_COST_FIELDS = {
+    "total_monthly": ("total_monthly", 0),
+    "total_annual": ("total_annual", 0),
+    "affordability_score": ("affordability_score", 0),
+    "cost_index": ("cost_index", 1.0),
+    "monthly_rent": ("housing.monthly_rent", 0),
+    "utilities": ("expenses.utilities", 0),
+    "groceries": ("expenses.groceries", 0),
+    "transportation": ("expenses.transportation", 0),
+    "healthcare": ("expenses.healthcare", 0),
+    "entertainment": ("expenses.entertainment", 0),
+}
+
+_SCORE_FIELDS = {
+    "overall_score": ("overall_score", 0),
+    "grade": ("grade", "N/A"),
+    "safety": ("component_scores.safety.score", 0),
+    "affordability": ("component_scores.affordability.score", 0),
+    "environment": ("component_scores.environment.score", 0),
+    "lifestyle": ("component_scores.lifestyle.score", 0),
+    "convenience": ("component_scores.convenience.score", 0),
+}
+
+
+def _flatten(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Nested dicts → one flat dict with dotted keys, walked once with an explicit stack."""
+    flat: Dict[str, Any] = {}
+    stack = deque([("", data)])
+    while stack:
+        prefix, node = stack.pop()
+        for key, value in node.items():
+            if isinstance(value, dict):
+                stack.append((f"{prefix}{key}.", value))
+            else:
+                flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _fields(data: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Template kwargs for spec; None never reaches a numeric format spec."""
+    flat = _flatten(data or {})
+    out = {}
+    for name, (path, default) in spec.items():
+        value = flat.get(path)
+        out[name] = default if value is None else value
+    return out
+
+
+# Each task: (numbered instruction, its slice of the output format spec)
+_OVERVIEW_TASK = ("""OVERVIEW (2-3 sentences)
    - Summarize the most important changes
    - Highlight key data points
    - Set the tone (positive, cautious, mixed)
+""", """---OVERVIEW---
+[2-3 sentence summary]
+""")
 
-2. LIFESTYLE CHANGES (exactly 6 bullet points with ✓)
+_CHANGES_TASK = ("""LIFESTYLE CHANGES (exactly 6 bullet points with ✓)
    - Sleep quality (reference crime data during sleep hours + noise levels)
    - Amenities access (reference actual amenity counts)
    - Dining/entertainment (reference data)
@@ -290,16 +298,27 @@ Based on this REAL DATA, provide:
    - Commute (reference actual time)
    - Cost (reference actual dollar amounts)
    - Be SPECIFIC with data points, not generic
+""", """---LIFESTYLE_CHANGES---
+✓ [Change 1 with specific data]
+✓ [Change 2 with specific data]
+✓ [Change 3 with specific data]
+✓ [Change 4 with specific data]
+✓ [Change 5 with specific data]
+✓ [Change 6 with specific data]
+""")
 
-3. DETAILED INSIGHTS (2-3 paragraphs)
+_INSIGHTS_TASK = ("""DETAILED INSIGHTS (2-3 paragraphs)
    - Deep dive into the most significant changes
    - Reference specific numbers from the data
    - Explain what the data means for daily life
    - Consider user's schedule and preferences
    - Provide context and interpretation
    - End with encouraging guidance
+""", """---INSIGHTS---
+[2-3 detailed paragraphs with data interpretation]
+""")
 
-4. PERSONALIZED ACTION STEPS (5-7 specific actions)
+_STEPS_TASK = ("""PERSONALIZED ACTION STEPS (5-7 specific actions)
    - Based on the ACTUAL data provided
    - Address any concerns identified
    - Suggest specific next steps
@@ -308,83 +327,447 @@ Based on this REAL DATA, provide:
    - Security measures if crime during sleep hours is high
    - Noise mitigation if needed
    - Be concrete and actionable, not generic
-
-Format EXACTLY as:
----OVERVIEW---
-[2-3 sentence summary]
-
----LIFESTYLE_CHANGES---
-✓ [Change 1 with specific data]
-✓ [Change 2 with specific data]
-✓ [Change 3 with specific data]
-✓ [Change 4 with specific data]
-✓ [Change 5 with specific data]
-✓ [Change 6 with specific data]
-
----INSIGHTS---
-[2-3 detailed paragraphs with data interpretation]
-
----ACTION_STEPS---
+""", """---ACTION_STEPS---
 → [Step 1: Specific action]
 → [Step 2: Specific action]
 → [Step 3: Specific action]
 → [Step 4: Specific action]
 → [Step 5: Specific action]
-"""
-        
-        return prompt
+""")
+
+
+def _instructions(*tasks) -> str:
+    steps = "\n".join(f"{i}. {task}" for i, (task, _) in enumerate(tasks, 1))
+    spec = "\n".join(fmt for _, fmt in tasks)
+    return f"\n## INSTRUCTIONS\n\nBased on the REAL DATA in the user message, provide:\n\n{steps}\nFormat EXACTLY as:\n{spec}"
+
+
+_INSTRUCTIONS = _instructions(_OVERVIEW_TASK, _CHANGES_TASK, _INSIGHTS_TASK, _STEPS_TASK)
+
+# Split routing: the extractive summary goes to the small model, the analysis to the large one
+_SUMMARY_MODEL = "llama-3.1-8b-instant"
+_SUMMARY_INSTRUCTIONS = _instructions(_OVERVIEW_TASK, _CHANGES_TASK)
+_INSIGHTS_INSTRUCTIONS = _instructions(_INSIGHTS_TASK, _STEPS_TASK)
+
+# Everything static — persona, instructions, output format — lives in the system message,
+# a byte-identical prefix per call type that the provider can serve from its prompt cache.
+# The user message then carries only the per-analysis data.
+_ANALYSIS_SYSTEM = _SYSTEM_PROMPT + "\n" + _INSTRUCTIONS
+_SUMMARY_SYSTEM = _SYSTEM_PROMPT + "\n" + _SUMMARY_INSTRUCTIONS
+_INSIGHTS_SYSTEM = _SYSTEM_PROMPT + "\n" + _INSIGHTS_INSTRUCTIONS
+
+# Output-token budget: fixed summary share plus an insights share that grows with the
+# optional context the model is asked to reason about
+_SUMMARY_TOKENS = 600
+_INSIGHTS_BASE_TOKENS = 600
+_PREFERENCES_TOKENS = 400
+_SCORES_TOKENS = 500
+_MIN_OUTPUT_TOKENS = 800
+_MAX_OUTPUT_TOKENS = 2500
+
+
+# ── Response parsing ──────────────────────────────────────────────────────────
+# Body of each ---SECTION--- runs up to the next known header (or end of text)
+_SECTION_RE = re.compile(
+    r"---(OVERVIEW|LIFESTYLE_CHANGES|INSIGHTS|ACTION_STEPS)---(.*?)"
+    r"(?=---(?:OVERVIEW|LIFESTYLE_CHANGES|INSIGHTS|ACTION_STEPS)---|\Z)",
+    re.DOTALL,
+)
+# Whole bullet line (marker included) — the UI renders the ✓ / → as sent
+_BULLET_RE = re.compile(r"^[ \t]*((?:[✓•→-]|\d+[.)])[^\n]*?)[ \t]*$", re.MULTILINE)
+
+# Responses above this many characters are parsed off the event loop
+_INLINE_PARSE_LIMIT = 16_384
+
+# Response section header → key in the parsed result dict
+_SECTION_KEYS = {
+    "OVERVIEW": "overview_summary",
+    "LIFESTYLE_CHANGES": "lifestyle_changes",
+    "INSIGHTS": "ai_insights",
+    "ACTION_STEPS": "action_steps",
+}
+
+
+class LLMService:
+    def __init__(self):
+        # asyncio primitives are loop-bound, so keep one semaphore per event loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> AsyncGroq:
+        return get_groq_client()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency gate for Groq calls on the running event loop."""
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(max(1, int(settings.GROQ_MAX_CONCURRENCY)))
+            self._semaphores[loop] = sem
+        return sem
     
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse structured LLM response"""
+    async def generate_lifestyle_analysis(
+        self,
+        current_address: str,
+        destination_address: str,
+        crime_data: Dict[str, Any],
+        amenities_data: Dict[str, Any],
+        cost_data: Dict[str, Any],
+        noise_data: Dict[str, Any],
+        commute_data: Dict[str, Any],
+        user_preferences: Dict[str, Any] = None,
+        overall_scores: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate comprehensive lifestyle analysis using real data from:
+        - FBI Crime Data Explorer API (crime data)
+        - HowLoud SoundScore / Google Places + OpenStreetMap (noise modeling)
+        - Static 2024 cost of living data (cost)
+        """
         
+        inputs = (
+            current_address,
+            destination_address,
+            crime_data,
+            amenities_data,
+            cost_data,
+            noise_data,
+            commute_data,
+            user_preferences,
+            overall_scores
+        )
+
+        # Identical inputs give the same analysis — skip the round-trip on repeats
+        cache_key = _response_cache_key(*inputs)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Build context prompt with real data
+        context = self._build_analysis_prompt(*inputs)
+
+        # Overview + lifestyle changes from the small model, insights + action steps from
+        # the large one, concurrently — wall time is the slower call rather than the sum
+        budget = self._estimate_output_budget(user_preferences, overall_scores)
+        summary, insights = await asyncio.gather(
+            self._complete(_SUMMARY_MODEL, _SUMMARY_SYSTEM, context, max_tokens=_SUMMARY_TOKENS),
+            self._complete(_LLM_MODEL, _INSIGHTS_SYSTEM, context, max_tokens=budget - _SUMMARY_TOKENS),
+            return_exceptions=True,
+        )
+        summary_failed = isinstance(summary, BaseException)
+        insights_failed = isinstance(insights, BaseException)
+        for part, err in (("summary", summary), ("insights", insights)):
+            if isinstance(err, BaseException):
+                logger.warning("LLM %s call failed: %s", part, self._error_text(err))
+        if summary_failed and insights_failed:
+            return self._fallback(self._error_text(insights))
+
+        # Extract structured insights
+        result = await self._parse_async(
+            "\n".join(text for text in (summary, insights) if isinstance(text, str))
+        )
+        if summary_failed:
+            fallback = self._fallback(self._error_text(summary))
+            result["overview_summary"] = fallback["overview_summary"]
+            result["lifestyle_changes"] = []
+        elif insights_failed:
+            result["ai_insights"] = self._error_text(insights)
+            result["action_steps"] = []
+        else:
+            cache_set(cache_key, result, ttl=_RESPONSE_CACHE_TTL)
+        return result
+
+    @staticmethod
+    def _estimate_output_budget(
+        user_preferences: Dict[str, Any] = None,
+        overall_scores: Dict[str, Any] = None
+    ) -> int:
+        """Total max_tokens for one analysis, clamped to [800, 2500]."""
+        budget = _SUMMARY_TOKENS + _INSIGHTS_BASE_TOKENS
+        if user_preferences:
+            budget += _PREFERENCES_TOKENS
+        if overall_scores:
+            budget += _SCORES_TOKENS
+        return max(_MIN_OUTPUT_TOKENS, min(budget, _MAX_OUTPUT_TOKENS))
+
+    async def _complete(self, model: str, system: str, prompt: str, max_tokens: int) -> str:
+        """One chat completion — awaited so the event loop keeps serving other requests."""
+        logger.debug("LLM request model=%s prompt_chars=%d max_tokens=%d", model, len(prompt), max_tokens)
+        async with self._semaphore():
+            chat_completion = await asyncio.wait_for(
+                self.client.chat.completions.create(
+                    messages=self._messages(system, prompt),
+                    model=model,
+                    temperature=0.9,
+                    max_tokens=max_tokens
+                ),
+                timeout=_LLM_TIMEOUT,
+            )
+        return chat_completion.choices[0].message.content or ""
+
+    async def generate_lifestyle_analysis_many(
+        self,
+        payloads: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several analyses concurrently (e.g. one per destination being compared).
+        Each payload holds generate_lifestyle_analysis keyword arguments; results keep
+        payload order. Groq calls stay capped by the shared GROQ_MAX_CONCURRENCY gate.
+        """
+        async def _one(payload: Dict[str, Any]) -> Dict[str, Any]:
+            # Bad kwargs raise inside the task, so they fail that item only
+            return await self.generate_lifestyle_analysis(**payload)
+
+        results = await asyncio.gather(*map(_one, payloads), return_exceptions=True)
+        out = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("LLM batch item failed: %s", self._error_text(result))
+                result = self._fallback(self._error_text(result))
+            out.append(result)
+        return out
+
+    async def stream_lifestyle_analysis(
+        self,
+        current_address: str,
+        destination_address: str,
+        crime_data: Dict[str, Any],
+        amenities_data: Dict[str, Any],
+        cost_data: Dict[str, Any],
+        noise_data: Dict[str, Any],
+        commute_data: Dict[str, Any],
+        user_preferences: Dict[str, Any] = None,
+        overall_scores: Dict[str, Any] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_lifestyle_analysis.
+
+        Yields {"event": <result key>, "data": ...} as soon as each section is
+        closed by the next header (overview arrives long before action steps),
+        then {"event": "complete", "data": <full result>}. On failure the last
+        event is {"event": "error", "data": <fallback result>}.
+        """
+        inputs = (
+            current_address,
+            destination_address,
+            crime_data,
+            amenities_data,
+            cost_data,
+            noise_data,
+            commute_data,
+            user_preferences,
+            overall_scores
+        )
+
+        cache_key = _response_cache_key(*inputs)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            for key in _SECTION_KEYS.values():
+                yield {"event": key, "data": cached[key]}
+            yield {"event": "complete", "data": cached}
+            return
+
+        prompt = self._build_analysis_prompt(*inputs)
+
+        buffer = ""
+        pos = 0  # end of the last emitted section; earlier text is never rescanned
         try:
-            parts = response_text.split("---")
-            
-            overview = ""
-            lifestyle_changes = []
-            insights = ""
-            action_steps = []
-            
-            for i, part in enumerate(parts):
-                part = part.strip()
-                
-                if "OVERVIEW" in part:
-                    overview = parts[i + 1].strip() if i + 1 < len(parts) else ""
-                elif "LIFESTYLE_CHANGES" in part:
-                    changes_text = parts[i + 1].strip() if i + 1 < len(parts) else ""
-                    lifestyle_changes = [
-                        line.strip() for line in changes_text.split("\n")
-                        if line.strip() and ("✓" in line or "•" in line or line.startswith("-"))
-                    ]
-                elif "INSIGHTS" in part:
-                    insights_text = parts[i + 1].strip() if i + 1 < len(parts) else ""
-                    # Stop at ACTION_STEPS if present
-                    if "---ACTION_STEPS---" in insights_text:
-                        insights = insights_text.split("---ACTION_STEPS---")[0].strip()
-                    else:
-                        insights = insights_text
-                elif "ACTION_STEPS" in part:
-                    steps_text = parts[i + 1].strip() if i + 1 < len(parts) else ""
-                    action_steps = [
-                        line.strip() for line in steps_text.split("\n")
-                        if line.strip() and ("→" in line or "•" in line or line.startswith("-") or line.startswith("1"))
-                    ]
-            
-            return {
-                "overview_summary": overview or "Analysis generated successfully.",
-                "lifestyle_changes": lifestyle_changes[:6],  # Max 6 items
-                "ai_insights": insights or response_text,
-                "action_steps": action_steps[:7]  # Max 7 steps
-            }
-            
+            async with self._semaphore():
+                # Bounds time-to-first-byte; the body then arrives incrementally
+                stream = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        messages=self._messages(_ANALYSIS_SYSTEM, prompt),
+                        model=_LLM_MODEL,
+                        temperature=0.9,
+                        max_tokens=self._estimate_output_budget(user_preferences, overall_scores),
+                        stream=True
+                    ),
+                    timeout=_LLM_TIMEOUT,
+                )
+                try:
+                    async for chunk in stream:
+                        buffer += chunk.choices[0].delta.content or ""
+                        # Every match but the last is followed by another header, so it is final
+                        closed = list(_SECTION_RE.finditer(buffer, pos))[:-1]
+                        for m in closed:
+                            yield self._section_event(m.group(1), m.group(2))
+                        if closed:
+                            pos = closed[-1].end()
+                finally:
+                    # Also runs when the consumer stops early — release the connection
+                    await stream.response.aclose()
         except Exception as e:
-            print(f"Parse error: {e}")
-            return {
-                "overview_summary": "Analysis generated successfully.",
-                "lifestyle_changes": [],
-                "ai_insights": response_text,
-                "action_steps": []
+            logger.warning("LLM stream failed: %s", self._error_text(e))
+            yield {"event": "error", "data": self._fallback(self._error_text(e))}
+            return
+
+        result = await self._parse_async(buffer)
+        cache_set(cache_key, result, ttl=_RESPONSE_CACHE_TTL)
+        for m in _SECTION_RE.finditer(buffer, pos):
+            yield self._section_event(m.group(1), m.group(2))
+        yield {"event": "complete", "data": result}
+
+    @staticmethod
+    def _messages(system: str, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {
+                "role": "system",
+                "content": system
+            },
+            {
+                "role": "user",
+                "content": prompt
             }
+        ]
+
+    @staticmethod
+    def _error_text(error: BaseException) -> str:
+        if isinstance(error, asyncio.TimeoutError):
+            return f"The AI service did not respond within {_LLM_TIMEOUT:.0f} seconds."
+        return str(error)
+
+    @staticmethod
+    def _fallback(error: str) -> Dict[str, Any]:
+        return {
+            "overview_summary": "Analysis temporarily unavailable. Please check the detailed data tabs for comprehensive information.",
+            "lifestyle_changes": [],
+            "ai_insights": error,
+            "action_steps": []
+        }
+
+    @staticmethod
+    def _section_event(name: str, body: str) -> Dict[str, Any]:
+        """One streamed section, shaped like the matching key of the parsed result."""
+        body = body.strip()
+        if name == "LIFESTYLE_CHANGES":
+            data = _BULLET_RE.findall(body)[:6]
+        elif name == "ACTION_STEPS":
+            data = _BULLET_RE.findall(body)[:7]
+        else:
+            data = body
+        return {"event": _SECTION_KEYS[name], "data": data}
+    
+    def _build_analysis_prompt(
+        self,
+        current_address: str,
+        destination_address: str,
+        crime_data: Dict[str, Any],
+        amenities_data: Dict[str, Any],
+        cost_data: Dict[str, Any],
+        noise_data: Dict[str, Any],
+        commute_data: Dict[str, Any],
+        user_preferences: Dict[str, Any] = None,
+        overall_scores: Dict[str, Any] = None
+    ) -> str:
+        """Build the user message: the real data for this analysis (instructions live in the system message)"""
+        
+        parts = [_INTRO_TMPL.format(current_address=current_address, destination_address=destination_address)]
+
+        # Sections whose source data is missing are dropped rather than sent as rows of zeros
+        current_crime = crime_data.get('current', {})
+        dest_crime = crime_data.get('destination', {})
+        if current_crime or dest_crime:
+            crime_comp = crime_data.get('comparison', {})
+            parts.append(_CRIME_SECTION_TMPL.format(
+                current=self._format_crime(current_crime),
+                destination=self._format_crime(dest_crime),
+                crime_difference=crime_comp.get('crime_difference', 0),
+                score_difference=crime_comp.get('score_difference', 0),
+                recommendation=crime_comp.get('recommendation', 'Review crime patterns'),
+            ))
 
+        current_noise = noise_data.get('current', {})
+        dest_noise = noise_data.get('destination', {})
+        if current_noise or dest_noise:
+            noise_comp = noise_data.get('comparison', {})
+            parts.append(_NOISE_SECTION_TMPL.format(
+                current=self._format_noise(current_noise),
+                destination=self._format_noise(dest_noise),
+                db_difference=noise_comp.get('db_difference', 0),
+                description=noise_comp.get('recommendation', 'Similar'),
+                noise_preference=user_preferences.get('noise_preference', 'moderate') if user_preferences else 'moderate',
+                match_quality=noise_comp.get('preference_match', {}).get('quality', 'fair'),
+                recommendation=noise_comp.get('recommendation', 'Review noise levels'),
+            ))
+
+        current_cost = cost_data.get('current', {})
+        dest_cost = cost_data.get('destination', {})
+        if current_cost or dest_cost:
+            cost_comp = cost_data.get('comparison', {})
+            parts.append(_COST_SECTION_TMPL.format(
+                current=self._format_cost(current_cost),
+                destination=self._format_cost(dest_cost),
+                monthly_difference=cost_comp.get('monthly_difference', 0),
+                annual_difference=cost_comp.get('annual_difference', 0),
+                percent_change=cost_comp.get('percent_change', 0),
+                recommendation=cost_comp.get('recommendation', 'Review costs'),
+            ))
+
+        dest_amenities = amenities_data.get('destination', {})
+        if dest_amenities:
+            parts.append(_AMENITIES_TMPL.format(total_count=dest_amenities.get('total_count', 0)))
+            # Add amenity breakdown
+            parts.extend(
+                _AMENITY_ROW_TMPL.format(name=amenity_type.title(), count=count)
+                for amenity_type, count in dest_amenities.get('by_type', {}).items()
+            )
+
+        if commute_data:
+            parts.append(_COMMUTE_TMPL.format(
+                duration_minutes=commute_data.get('duration_minutes', 0),
+                distance=commute_data.get('distance', 'Unknown'),
+                method=commute_data.get('method', 'driving').title(),
+            ))
+
+        if user_preferences:
+            parts.append(_PREFERENCES_TMPL.format(
+                work_hours=user_preferences.get('work_hours', 'Not specified'),
+                sleep_hours=user_preferences.get('sleep_hours', 'Not specified'),
+                noise_tolerance=user_preferences.get('noise_preference', 'moderate').title(),
+                hobbies=', '.join(user_preferences.get('hobbies', ['None specified'])),
+            ))
+
+        if overall_scores:
+            parts.append(_SCORES_TMPL.format(
+                **_fields(overall_scores, _SCORE_FIELDS),
+                strengths=', '.join(overall_scores.get('strengths', [])),
+                concerns=', '.join([c['area'] for c in overall_scores.get('concerns', [])]),
+            ))
+
+        return "".join(parts)
+    
+    @staticmethod
+    def _format_crime(crime: Dict[str, Any]) -> str:
+        return _CRIME_LOCATION_TMPL.format(**_fields(crime, _CRIME_FIELDS))
+
+    @staticmethod
+    def _format_noise(noise: Dict[str, Any]) -> str:
+        return _NOISE_LOCATION_TMPL.format(**_fields(noise, _NOISE_FIELDS))
+
+    @staticmethod
+    def _format_cost(cost: Dict[str, Any]) -> str:
+        return _COST_LOCATION_TMPL.format(**_fields(cost, _COST_FIELDS))
+    
+    async def _parse_async(self, response_text: str) -> Dict[str, Any]:
+        """Parse inline for normal responses (well under a millisecond); hop to a thread only for outsized ones."""
+        if len(response_text) < _INLINE_PARSE_LIMIT:
+            return self._parse_llm_response(response_text)
+        return await asyncio.to_thread(self._parse_llm_response, response_text)
+
+    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
+        """Parse structured LLM response"""
+        
+        text = response_text or ""
+        # First occurrence wins if the model repeats a header
+        sections: Dict[str, str] = {}
+        for m in _SECTION_RE.finditer(text):
+            sections.setdefault(m.group(1), m.group(2).strip())
+        
+        return {
+            "overview_summary": sections.get("OVERVIEW") or "Analysis generated successfully.",
+            "lifestyle_changes": _BULLET_RE.findall(sections.get("LIFESTYLE_CHANGES", ""))[:6],  # Max 6 items
+            "ai_insights": sections.get("INSIGHTS") or response_text,
+            "action_steps": _BULLET_RE.findall(sections.get("ACTION_STEPS", ""))[:7]  # Max 7 steps
+        }
 
 llm_service = LLMService()
\ No newline at end of file
@@ -1,9 +1,16 @@
+import logging
 import re
 import os
 import asyncio
-import httpx
+from bisect import bisect_right
 from typing import Dict, Any, List, Optional, Tuple
 
+from app.core.geo import geocode_cache_key, normalize_address
+from app.core.http_client import get_async_client
+from app.core.redis_cache import cache_get, cache_set, CACHE_30_DAYS
+
+logger = logging.getLogger(__name__)
+
 # HowLoud SoundScore fallback values per state (score 0-100, higher = quieter).
 # Obtained by calling the HowLoud API at the most populous city in each state.
 # AK and HI returned 100 (outside HowLoud coverage) — substituted realistic estimates.
@@ -20,6 +27,50 @@ _STATE_SCORES: Dict[str, int] = {
     'VA': 61, 'WA': 61, 'WV': 65, 'WI': 64, 'WY': 70,
 }
 
+# ", GA" / ", GA 30303" in a geocoded address
+_STATE_RE = re.compile(r',\s*([A-Z]{2})\b')
+
+# (HowLoud score, dB) anchors for _score_to_db, ascending by score
+_SCORE_DB_BREAKPOINTS: Tuple[Tuple[int, int], ...] = (
+    (0, 85), (25, 75), (50, 70), (60, 65), (70, 55), (80, 45), (100, 35),
+)
+
+# dB band lower bounds; bisect_right into these indexes the two tuples below
+_DB_THRESHOLDS: Tuple[int, ...] = (45, 55, 65, 75)
+_DB_CATEGORIES: Tuple[str, ...] = ("Very Quiet", "Quiet", "Moderate", "Noisy", "Very Noisy")
+_DB_LEVELS: Tuple[Tuple[str, str], ...] = (
+    ("Quiet (below 45 dB)",
+     "Peaceful environment with minimal noise pollution"),
+    ("Quiet-Moderate (45-55 dB)",
+     "Relatively quiet with occasional traffic or activity"),
+    ("Moderate (55-65 dB)",
+     "Moderate noise levels with typical urban or suburban sounds"),
+    ("Loud (65-75 dB)",
+     "Moderately loud with significant traffic, transit, or nightlife nearby"),
+    ("Very Loud (75-85 dB)",
+     "High noise environment with highways, airports, or dense urban activity"),
+)
+
+# Fit score (0-100) of each noise category for each preference, in _DB_CATEGORIES order
+_PREFERENCE_SCORES: Dict[str, Dict[str, int]] = {
+    pref: dict(zip(_DB_CATEGORIES, scores))
+    for pref, scores in (
+        ('quiet',    (100, 90, 60,  30, 10)),
+        ('moderate', (70,  85, 100, 85, 50)),
+        ('lively',   (40,  60, 80,  95, 100)),
+    )
+}
+
+# Categories that suit each preference (runs of _DB_CATEGORIES), and how a match is described
+_GOOD_MATCHES: Dict[str, frozenset] = {
+    'quiet':    frozenset(_DB_CATEGORIES[0:2]),
+    'moderate': frozenset(_DB_CATEGORIES[1:4]),
+    'lively':   frozenset(_DB_CATEGORIES[2:5]),
+}
+_MATCH_QUALITY: Dict[str, str] = {'quiet': 'peaceful', 'moderate': 'balanced', 'lively': 'vibrant'}
+
+_HOWLOUD_SOURCE = 'HowLoud SoundScore API'
+
 
 class NoiseService:
     """
@@ -42,7 +93,7 @@ class NoiseService:
     @staticmethod
     def _state_from_address(address: str) -> Optional[str]:
         """Extract a 2-letter US state code from a geocoded address string."""
-        match = re.search(r',\s*([A-Z]{2})\b', address)
+        match = _STATE_RE.search(address)
         if match:
             code = match.group(1)
             if code != 'US':
@@ -55,19 +106,26 @@ class NoiseService:
         """Convert address to (lat, lng) using Google Geocoding API."""
         if not self.google_api_key:
             return None
+
+        # Shared with PlacesService.geocode_address, which usually resolves the same address first
+        cache_key = geocode_cache_key(address)
+        cached = cache_get(cache_key)
+        if cached:
+            return cached[0], cached[1]
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(self.geocoding_url, params={
-                    'address': address,
-                    'key': self.google_api_key,
-                })
-                data = resp.json()
-                if data.get('status') == 'OK' and data.get('results'):
-                    loc = data['results'][0]['geometry']['location']
-                    return loc['lat'], loc['lng']
-                print(f"   ⚠️ Geocoding status: {data.get('status')} for '{address}'")
+            client = get_async_client()
+            resp = await client.get(self.geocoding_url, timeout=10.0, params={
+                'address': address,
+                'key': self.google_api_key,
+            })
+            data = resp.json()
+            if data.get('status') == 'OK' and data.get('results'):
+                loc = data['results'][0]['geometry']['location']
+                cache_set(cache_key, [loc['lat'], loc['lng']], ttl=CACHE_30_DAYS)
+                return loc['lat'], loc['lng']
+            logger.warning("Geocoding status %s for %r", data.get('status'), address)
         except Exception as e:
-            print(f"   ⚠️ Geocoding error: {e}")
+            logger.warning("Geocoding error: %s", e)
         return None
 
     # ── HowLoud API ───────────────────────────────────────────────────────────
@@ -79,25 +137,33 @@ class NoiseService:
         Response shape: {"status":"OK","result":[{score, traffic, local, airports, ...}]}
         """
         if not self.howloud_api_key:
-            print(f"   ⚠️ HowLoud API key not set (HOWLOUD_API_KEY env var missing)")
+            logger.warning("HowLoud API key not set (HOWLOUD_API_KEY env var missing)")
             return None
+
+        # Soundscapes change slowly; ~100m grid cells share one lookup for 30 days
+        cache_key = f"howloud:{lat:.3f},{lng:.3f}"
+        cached = cache_get(cache_key)
+        if cached:
+            return cached
         try:
-            async with httpx.AsyncClient(timeout=8.0) as client:
-                resp = await client.get(
-                    self.howloud_url,
-                    params={'lat': lat, 'lng': lng},
-                    headers={'x-api-key': self.howloud_api_key},
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    result = data.get('result', [])
-                    if result and 'score' in result[0]:
-                        return result[0]
-                    print(f"   ⚠️ HowLoud API: unexpected response shape: {str(data)[:120]}")
-                else:
-                    print(f"   ⚠️ HowLoud API: HTTP {resp.status_code} – {resp.text[:120]}")
+            client = get_async_client()
+            resp = await client.get(
+                self.howloud_url,
+                params={'lat': lat, 'lng': lng},
+                headers={'x-api-key': self.howloud_api_key},
+                timeout=8.0,
+            )
+            if resp.status_code == 200:
+                data = resp.json()
+                result = data.get('result', [])
+                if result and 'score' in result[0]:
+                    cache_set(cache_key, result[0], ttl=CACHE_30_DAYS)
+                    return result[0]
+                logger.warning("HowLoud API: unexpected response shape: %.120s", data)
+            else:
+                logger.warning("HowLoud API: HTTP %s – %.120s", resp.status_code, resp.text)
         except Exception as e:
-            print(f"   ⚠️ HowLoud API error: {e}")
+            logger.warning("HowLoud API error: %s", e)
         return None
 
     @staticmethod
@@ -113,11 +179,8 @@ class NoiseService:
           Score  71–80  → 55–45 dB  (Quiet)
           Score  81–100 → 45–35 dB  (Very Quiet)
         """
-        breakpoints = [(0, 85), (25, 75), (50, 70), (60, 65), (70, 55), (80, 45), (100, 35)]
-        s = max(0.0, min(100.0, score))
-        for i in range(len(breakpoints) - 1):
-            s0, db0 = breakpoints[i]
-            s1, db1 = breakpoints[i + 1]
+        s = 0.0 if score < 0.0 else 100.0 if score > 100.0 else score
+        for (s0, db0), (s1, db1) in zip(_SCORE_DB_BREAKPOINTS, _SCORE_DB_BREAKPOINTS[1:]):
             if s0 <= s <= s1:
                 t = (s - s0) / (s1 - s0)
                 return round(db0 + t * (db1 - db0), 1)
@@ -146,10 +209,10 @@ class NoiseService:
         preference_match  = self._check_preference_match(noise_category, user_preference)
         scoretext = data.get('scoretext', '').strip()
 
-        print(f"   🔊 HowLoud SoundScore: {score:.0f}/100 → {estimated_db:.1f} dB ({noise_category})")
+        logger.debug("HowLoud SoundScore: %.0f/100 → %.1f dB (%s)", score, estimated_db, noise_category)
         return self._build_result(estimated_db, scoretext or description, indicators,
                                   preference_score, noise_category, level, preference_match,
-                                  'HowLoud SoundScore API')
+                                  _HOWLOUD_SOURCE)
 
     def _state_score_to_result(self, score: int, user_preference: str) -> Dict[str, Any]:
         """Convert a hardcoded HowLoud state score to our standard result format."""
@@ -190,20 +253,22 @@ class NoiseService:
         Estimate noise level for *address*.
         Priority: HowLoud (address) → HowLoud (state average) → static city lookup.
         """
-        lat_lng = await self._geocode_address(address)
-        if lat_lng:
-            howloud_data = await self._fetch_howloud_score(*lat_lng)
-            if howloud_data:
-                return self._howloud_to_result(howloud_data, user_preference)
+        # Geocoding only feeds HowLoud — skip both round trips when HowLoud is not configured
+        if self.howloud_api_key:
+            lat_lng = await self._geocode_address(address)
+            if lat_lng:
+                howloud_data = await self._fetch_howloud_score(*lat_lng)
+                if howloud_data:
+                    return self._howloud_to_result(howloud_data, user_preference)
 
         # Fallback 1: hardcoded HowLoud state score
         state = self._state_from_address(address)
         if state and state in _STATE_SCORES:
-            print(f"   ℹ️ HowLoud unavailable – using state-level score for {state} ({_STATE_SCORES[state]}/100)")
+            logger.info("HowLoud unavailable – using state-level score for %s (%d/100)", state, _STATE_SCORES[state])
             return self._state_score_to_result(_STATE_SCORES[state], user_preference)
 
         # Fallback 2: national average (score 65 → ~55.8 dB, moderate)
-        print(f"   ⚠️ No state match for '{address}' – using national average")
+        logger.info("No state match for %r – using national average", address)
         return self._state_score_to_result(65, user_preference)
 
     # ── Comparison ────────────────────────────────────────────────────────────
@@ -219,14 +284,45 @@ class NoiseService:
         Returns a nested dict with 'current', 'destination', and 'comparison' keys
         so callers need only this one call to get all noise data.
         """
+        pref = (user_preference or 'moderate').lower()
+        cache_key = f"noise:compare:{normalize_address(current_address)}|{normalize_address(destination_address)}|{pref}"
+        cached = cache_get(cache_key)
+        if cached:
+            return cached
+
         current, destination = await asyncio.gather(
             self.estimate_noise_level(current_address, user_preference),
             self.estimate_noise_level(destination_address, user_preference),
         )
+        result = self._build_comparison(current, destination, pref)
+        # Skip caching fallback estimates so the next request retries HowLoud
+        if current['data_source'] == destination['data_source'] == _HOWLOUD_SOURCE:
+            cache_set(cache_key, result, ttl=CACHE_30_DAYS)
+        return result
 
+    async def compare_noise_levels_batch(
+        self,
+        current_address: str,
+        destination_addresses: List[str],
+        user_preference: str = "moderate",
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare one current address against several destinations.
+        The current location is estimated once and every estimate runs in parallel;
+        results are in the same order as *destination_addresses*.
+        """
+        pref = (user_preference or 'moderate').lower()
+        current, *destinations = await asyncio.gather(
+            self.estimate_noise_level(current_address, user_preference),
+            *(self.estimate_noise_level(addr, user_preference) for addr in destination_addresses),
+        )
+        return [self._build_comparison(current, destination, pref) for destination in destinations]
+
+    def _build_comparison(
+        self, current: Dict[str, Any], destination: Dict[str, Any], pref: str,
+    ) -> Dict[str, Any]:
         db_diff    = destination['score'] - current['score']
         score_diff = destination['noise_score'] - current['noise_score']
-        pref       = (user_preference or 'moderate').lower()
         impact, analysis = self._generate_impact_analysis(db_diff, pref)
 
         return {
@@ -264,11 +360,7 @@ class NoiseService:
     # ── Scoring helpers ───────────────────────────────────────────────────────
 
     def categorize_noise_by_db(self, db_score: float) -> str:
-        if db_score >= 75:   return "Very Noisy"
-        elif db_score >= 65: return "Noisy"
-        elif db_score >= 55: return "Moderate"
-        elif db_score >= 45: return "Quiet"
-        return "Very Quiet"
+        return _DB_CATEGORIES[bisect_right(_DB_THRESHOLDS, db_score)]
 
     def calculate_preference_score(
         self,
@@ -276,47 +368,23 @@ class NoiseService:
         noise_category: str,
         user_preference: str = "moderate",
     ) -> float:
-        preference_scores = {
-            'quiet':    {'Very Quiet': 100, 'Quiet': 90, 'Moderate': 60, 'Noisy': 30, 'Very Noisy': 10},
-            'moderate': {'Very Quiet': 70,  'Quiet': 85, 'Moderate': 100, 'Noisy': 85, 'Very Noisy': 50},
-            'lively':   {'Very Quiet': 40,  'Quiet': 60, 'Moderate': 80, 'Noisy': 95, 'Very Noisy': 100},
-        }
         pref = (user_preference or 'moderate').lower()
-        if pref not in preference_scores:
+        if pref not in _PREFERENCE_SCORES:
             pref = 'moderate'
-        base_score = preference_scores[pref].get(noise_category, 50)
-        print(f"   🔊 Noise scoring: {noise_category} ({db_score:.1f} dB) + '{pref}' preference = {base_score}/100")
+        base_score = _PREFERENCE_SCORES[pref].get(noise_category, 50)
+        logger.debug("Noise scoring: %s (%.1f dB) + %r preference = %d/100", noise_category, db_score, pref, base_score)
         return float(base_score)
 
     def _check_preference_match(self, noise_category: str, user_preference: str) -> Dict[str, Any]:
         pref = (user_preference or 'moderate').lower()
-        good_matches = {
-            'quiet':    ['Very Quiet', 'Quiet'],
-            'moderate': ['Quiet', 'Moderate', 'Noisy'],
-            'lively':   ['Moderate', 'Noisy', 'Very Noisy'],
-        }
-        quality_map = {'quiet': 'peaceful', 'moderate': 'balanced', 'lively': 'vibrant'}
         return {
-            'is_good_match': noise_category in good_matches.get(pref, []),
-            'quality': quality_map.get(pref, 'balanced'),
+            'is_good_match': noise_category in _GOOD_MATCHES.get(pref, ()),
+            'quality': _MATCH_QUALITY.get(pref, 'balanced'),
         }
 
     @staticmethod
     def _level_description(final_db: float) -> Tuple[str, str]:
-        if final_db >= 75:
-            return ("Very Loud (75-85 dB)",
-                    "High noise environment with highways, airports, or dense urban activity")
-        elif final_db >= 65:
-            return ("Loud (65-75 dB)",
-                    "Moderately loud with significant traffic, transit, or nightlife nearby")
-        elif final_db >= 55:
-            return ("Moderate (55-65 dB)",
-                    "Moderate noise levels with typical urban or suburban sounds")
-        elif final_db >= 45:
-            return ("Quiet-Moderate (45-55 dB)",
-                    "Relatively quiet with occasional traffic or activity")
-        return ("Quiet (below 45 dB)",
-                "Peaceful environment with minimal noise pollution")
+        return _DB_LEVELS[bisect_right(_DB_THRESHOLDS, final_db)]
 
     @staticmethod
     def _generate_impact_analysis(db_diff: float, pref: str) -> Tuple[str, str]:
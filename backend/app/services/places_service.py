@@ -1,20 +1,154 @@
+import re
+import threading
+import time
 import googlemaps
+from concurrent.futures import ThreadPoolExecutor
+from googlemaps import exceptions as gmaps_exceptions
 from typing import Dict, Any, Optional, Tuple, List
 from app.core.config import settings
+from app.core.geo import geocode_cache_key, haversine_m
+from app.core.redis_cache import cache_get, cache_set, CACHE_30_DAYS
+
+# Long-lived pools shared by every request, so threads (and the googlemaps session's
+# keep-alive connections) are reused instead of rebuilt per call. Location-level work
+# and the per-category calls it fans out to use separate pools, so an outer task can
+# never block waiting on inner work queued behind it.
+# The search pool is sized to the limiter's ceiling: more threads could never be
+# admitted, fewer would cap the limiter below what it has learned the API can take.
+_MAX_SEARCHES_IN_FLIGHT = 16
+_location_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="places-location")
+_search_pool = ThreadPoolExecutor(max_workers=_MAX_SEARCHES_IN_FLIGHT, thread_name_prefix="places-search")
+
+
+class _AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease cap on in-flight Places calls.
+    Every *window* successful calls the limit grows by one if their average latency
+    stayed under *latency_target* (seconds), otherwise it halves; an overload error
+    (timeout, HTTP error, OVER_QUERY_LIMIT) halves it immediately.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 2, maximum: int = 16,
+                 latency_target: float = 0.4, window: int = 8):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.window = window
+        self._in_flight = 0
+        self._latencies: List[float] = []
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if overloaded:
+                self._decrease()
+            else:
+                self._latencies.append(latency)
+                if len(self._latencies) >= self.window:
+                    if sum(self._latencies) / len(self._latencies) <= self.latency_target:
+                        self.limit = min(self.maximum, self.limit + 1)
+                    else:
+                        self._decrease()
+            self._cond.notify_all()
+
+    def _decrease(self) -> None:
+        self.limit = max(self.minimum, self.limit // 2)
+        self._latencies.clear()
+
+
+def _is_overload(e: Exception) -> bool:
+    if isinstance(e, (gmaps_exceptions.Timeout, gmaps_exceptions.HTTPError, gmaps_exceptions.TransportError)):
+        return True
+    return getattr(e, 'status', None) == 'OVER_QUERY_LIMIT'
+
+
+# Hobby -> (display_name, places_nearby params). 'type' is an exact place type,
+# 'keyword' a free-text search. Params are shared across calls, so never mutate them.
+_HOBBY_SEARCHES: Dict[str, Tuple[str, Dict[str, str]]] = {
+    'coffee':      ('cafes',          {'type': 'cafe'}),
+    'cafes':       ('cafes',          {'type': 'cafe'}),
+    'movies':      ('movie theaters', {'type': 'movie_theater'}),
+    'cinema':      ('movie theaters', {'type': 'movie_theater'}),
+    'shopping':    ('shopping malls', {'type': 'shopping_mall'}),
+    'gym':         ('gyms',           {'type': 'gym'}),
+    'fitness':     ('gyms',           {'type': 'gym'}),
+    'workout':     ('gyms',           {'type': 'gym'}),
+    'bars':        ('bars',           {'type': 'bar'}),
+    'nightlife':   ('bars',           {'type': 'bar'}),
+    'restaurants': ('restaurants',    {'type': 'restaurant'}),
+    'dining':      ('restaurants',    {'type': 'restaurant'}),
+    'food':        ('restaurants',    {'type': 'restaurant'}),
+    'parks':       ('parks',          {'type': 'park'}),
+    'outdoors':    ('parks',          {'type': 'park'}),
+    'nature':      ('parks',          {'type': 'park'}),
+    'library':     ('libraries',      {'type': 'library'}),
+    'reading':     ('libraries',      {'type': 'library'}),
+    'books':       ('libraries',      {'type': 'library'}),
+    'hiking':      ('hiking trails',  {'keyword': 'hiking trail'}),
+    'sports':      ('sports venues',  {'type': 'stadium'}),
+}
+
+_WORD_RE = re.compile(r'[a-z]+')
+
+# Searched for every location regardless of hobbies; subway hits are folded into train stations
+_ESSENTIAL_SEARCHES: Tuple[Tuple[str, Dict[str, str]], ...] = (
+    ('grocery stores',   {'type': 'grocery_or_supermarket'}),
+    ('hospitals',        {'keyword': 'hospital'}),
+    ('pharmacies',       {'keyword': 'pharmacy'}),
+    ('train stations',   {'type': 'train_station'}),
+    ('_subway_stations', {'type': 'subway_station'}),
+    ('bus stations',     {'type': 'bus_station'}),
+    ('airports',         {'keyword': 'airport'}),
+)
+_ESSENTIAL_NAMES = frozenset(name for name, _ in _ESSENTIAL_SEARCHES)
+
+# Used in place of hobby searches when the profile lists none
+_DEFAULT_SEARCHES: Tuple[Tuple[str, Dict[str, str]], ...] = (
+    ('restaurants', {'type': 'restaurant'}),
+    ('cafes',       {'type': 'cafe'}),
+    ('parks',       {'type': 'park'}),
+)
+
+# Distance Matrix accepts at most 25 origins per request
+_MAX_MATRIX_ORIGINS = 25
+
+# Nearby results shift as places open and close; a day keeps repeat comparisons off the API
+_PLACES_CACHE_TTL = 24 * 60 * 60
+
+# Shared by every search thread so the cap applies process-wide
+_places_limiter = _AIMDLimiter(maximum=_MAX_SEARCHES_IN_FLIGHT)
 
 
 class PlacesService:
     """Service for Google Places API operations"""
     
     def __init__(self):
-        self.client = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        # The client throttles itself to queries_per_second (sliding one-second window)
+        # and retries OVER_QUERY_LIMIT responses with backoff
+        self.client = googlemaps.Client(
+            key=settings.GOOGLE_MAPS_API_KEY,
+            queries_per_second=settings.GOOGLE_PLACES_QPS,
+        )
     
     def geocode_address(self, address: str) -> Optional[Tuple[float, float]]:
         """Convert address to coordinates"""
+        cache_key = geocode_cache_key(address)
+        cached = cache_get(cache_key)
+        if cached:
+            return cached[0], cached[1]
         try:
             result = self.client.geocode(address)
             if result:
                 location = result[0]['geometry']['location']
+                cache_set(cache_key, [location['lat'], location['lng']], ttl=CACHE_30_DAYS)
                 return location['lat'], location['lng']
             return None, None
         except Exception as e:
@@ -26,7 +160,9 @@ class PlacesService:
         lat: float, 
         lng: float, 
         radius: int = 1609, 
-        hobbies: list = None
+        hobbies: list = None,
+        include_locations: bool = True,
+        search_tasks: Optional[List[Tuple[str, Dict[str, str]]]] = None,
     ) -> Tuple[Dict[str, int], Dict[str, List[Dict]]]:
         """
         Get count AND locations of nearby amenities within 1 mile radius
@@ -35,131 +171,161 @@ class PlacesService:
             Tuple of (counts_dict, locations_dict)
             - counts_dict: {category: count}
             - locations_dict: {category: [{"name": "", "lat": 0, "lng": 0, "address": ""}]}
+              (empty when include_locations is False — counts only)
+
+        *search_tasks* (from _search_tasks) takes the place of *hobbies* when a caller
+        searching several locations has already resolved them.
         """
-        
-        # Map hobbies to Google Places search params.
-        # Each entry: (search_method, value, display_name)
-        # search_method is 'type' (exact place type) or 'keyword' (free-text search)
-        hobby_to_place_type = {
-            'coffee':      ('type',    'cafe',          'cafes'),
-            'cafes':       ('type',    'cafe',          'cafes'),
-            'movies':      ('type',    'movie_theater', 'movie theaters'),
-            'cinema':      ('type',    'movie_theater', 'movie theaters'),
-            'shopping':    ('type',    'shopping_mall', 'shopping malls'),
-            'gym':         ('type',    'gym',           'gyms'),
-            'fitness':     ('type',    'gym',           'gyms'),
-            'workout':     ('type',    'gym',           'gyms'),
-            'bars':        ('type',    'bar',           'bars'),
-            'nightlife':   ('type',    'bar',           'bars'),
-            'restaurants': ('type',    'restaurant',    'restaurants'),
-            'dining':      ('type',    'restaurant',    'restaurants'),
-            'food':        ('type',    'restaurant',    'restaurants'),
-            'parks':       ('type',    'park',          'parks'),
-            'outdoors':    ('type',    'park',          'parks'),
-            'nature':      ('type',    'park',          'parks'),
-            'library':     ('type',    'library',       'libraries'),
-            'reading':     ('type',    'library',       'libraries'),
-            'books':       ('type',    'library',       'libraries'),
-            'hiking':      ('keyword', 'hiking trail',  'hiking trails'),
-            'sports':      ('type',    'stadium',       'sports venues'),
-        }
+        all_tasks = search_tasks if search_tasks is not None else self._search_tasks(hobbies)
 
-        # Always include essentials (all type-based)
-        essential_tasks = [
-            ('grocery stores', {'type': 'grocery_or_supermarket'}),
-            ('hospitals',      {'keyword': 'hospital'}),
-            ('pharmacies',     {'keyword': 'pharmacy'}),
-            ('train stations', {'type': 'train_station'}),
-            ('_subway_stations', {'type': 'subway_station'}),
-            ('bus stations',   {'type': 'bus_station'}),
-            ('airports',       {'keyword': 'airport'}),
-        ]
+        print(f"   Searching within {radius}m (~{radius/1609:.1f} miles)")
+        print(f"   Categories: {[t[0] for t in all_tasks]}")
+
+        # Each category is an independent network call — fan them out so the
+        # search costs ~1 round trip instead of one per category
+        results = list(_search_pool.map(
+            lambda task: self._search_category(lat, lng, radius, *task, include_locations),
+            all_tasks
+        ))
 
-        # Build ordered list of (display_name, search_params) to avoid duplicates
-        seen_display_names = {t[0] for t in essential_tasks}
+        counts = {name: count for name, count, _, _ in results}
+        locations = {name: places for name, _, places, _ in results}
+        place_ids = {name: ids for name, _, _, ids in results}
+
+        # Merge subway results into train stations; a station tagged with both types
+        # comes back from both searches and is counted once
+        if '_subway_stations' in counts:
+            train_ids = set(place_ids.get('train stations', ()))
+            subway_ids = place_ids['_subway_stations']
+            dupes = {pid for pid in subway_ids if pid is not None and pid in train_ids}
+            counts['train stations'] = (
+                counts.get('train stations', 0) + counts.pop('_subway_stations') - len(dupes)
+            )
+            subway_locations = [
+                loc for loc, pid in zip(locations.pop('_subway_stations', []), subway_ids)
+                if pid not in dupes
+            ]
+            locations['train stations'] = locations.get('train stations', []) + subway_locations
+
+        # Drop categories with no results — they add no value to the UI
+        counts    = {k: v for k, v in counts.items()    if v > 0}
+        locations = {k: v for k, v in locations.items() if v}
+
+        return counts, locations
+    
+    @staticmethod
+    def _search_tasks(hobbies: Optional[list]) -> List[Tuple[str, Dict[str, str]]]:
+        """Resolve hobbies to the ordered, de-duplicated (display_name, search_params) list."""
+        seen_display_names = set(_ESSENTIAL_NAMES)
         hobby_tasks = []
 
         if hobbies:
             print(f"🔍 Searching amenities for hobbies: {hobbies}")
             for hobby in hobbies:
                 hobby_lower = hobby.lower().strip()
-                if hobby_lower in hobby_to_place_type:
-                    method, value, display_name = hobby_to_place_type[hobby_lower]
-                    if display_name not in seen_display_names:
-                        seen_display_names.add(display_name)
-                        if method == 'type':
-                            hobby_tasks.append((display_name, {'type': value}))
-                        else:
-                            hobby_tasks.append((display_name, {'keyword': value}))
+                # Exact hobby first; otherwise any known word in it ("coffee shops" -> coffee)
+                words = (hobby_lower,) if hobby_lower in _HOBBY_SEARCHES else _WORD_RE.findall(hobby_lower)
+                for word in words:
+                    search = _HOBBY_SEARCHES.get(word)
+                    if search and search[0] not in seen_display_names:
+                        seen_display_names.add(search[0])
+                        hobby_tasks.append(search)
         else:
             print(f"ℹ️  No hobbies specified, using defaults")
-            for display_name, params in [
-                ('restaurants', {'type': 'restaurant'}),
-                ('cafes',       {'type': 'cafe'}),
-                ('parks',       {'type': 'park'}),
-            ]:
+            for display_name, params in _DEFAULT_SEARCHES:
                 if display_name not in seen_display_names:
                     seen_display_names.add(display_name)
                     hobby_tasks.append((display_name, params))
 
-        all_tasks = essential_tasks + hobby_tasks
-
-        print(f"   Searching within {radius}m (~{radius/1609:.1f} miles)")
-        print(f"   Categories: {[t[0] for t in all_tasks]}")
-
-        counts = {}
-        locations = {}
+        return [*_ESSENTIAL_SEARCHES, *hobby_tasks]
 
-        for display_name, search_params in all_tasks:
-            try:
-                # Simple API call - NO PAGINATION
-                response = self.client.places_nearby(
-                    location=(lat, lng),
-                    radius=radius,
-                    **search_params
-                )
-                
-                results = response.get('results', [])
-                result_count = len(results)
-                counts[display_name] = result_count
+    def _search_category(
+        self,
+        lat: float,
+        lng: float,
+        radius: int,
+        display_name: str,
+        search_params: Dict[str, str],
+        include_locations: bool = True
+    ) -> Tuple[str, int, List[Dict], Tuple[Optional[str], ...]]:
+        """
+        Run one places_nearby search and return (display_name, count, location_list, place_ids).
+        place_ids lines up with the results (and with location_list when it is filled).
+        """
+        try:
+            results = self._places_nearby(lat, lng, radius, search_params)
+            result_count = len(results)
 
-                # Store location data for mapping
-                location_list = []
+            # Store location data for mapping (skipped when only counts are needed)
+            location_list = []
+            if include_locations:
                 for place in results:
                     location_list.append({
-                        'name': place.get('name', 'Unknown'),
-                        'lat': place['geometry']['location']['lat'],
-                        'lng': place['geometry']['location']['lng'],
-                        'address': place.get('vicinity', ''),
+                        'name': place['name'],
+                        'lat': place['lat'],
+                        'lng': place['lng'],
+                        'address': place['address'],
                         'type': display_name
                     })
 
-                locations[display_name] = location_list
+            # Log if we hit the cap
+            if result_count == 20:
+                print(f"   ⚠️  {display_name}: 20 (API limit - may be more)")
+            elif result_count > 0:
+                print(f"   ✓ {display_name}: {result_count}")
+            else:
+                print(f"   — {display_name}: 0 (will be hidden)")
 
-                # Log if we hit the cap
-                if result_count == 20:
-                    print(f"   ⚠️  {display_name}: 20 (API limit - may be more)")
-                elif result_count > 0:
-                    print(f"   ✓ {display_name}: {result_count}")
-                else:
-                    print(f"   — {display_name}: 0 (will be hidden)")
+            return display_name, result_count, location_list, tuple(p.get('place_id') for p in results)
 
-            except Exception as e:
-                print(f"   ❌ Error fetching {display_name}: {e}")
-                counts[display_name] = 0
-                locations[display_name] = []
+        except Exception as e:
+            print(f"   ❌ Error fetching {display_name}: {e}")
+            return display_name, 0, [], ()
 
-        # Merge subway results into train stations
-        if '_subway_stations' in counts:
-            counts['train stations'] = counts.get('train stations', 0) + counts.pop('_subway_stations')
-            locations['train stations'] = locations.get('train stations', []) + locations.pop('_subway_stations', [])
+    def _places_nearby(
+        self,
+        lat: float,
+        lng: float,
+        radius: int,
+        search_params: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        """
+        One places_nearby search, trimmed to the fields we use and cached per ~100m cell.
+        Only successful responses are cached; errors propagate to the caller.
+        """
+        params = ','.join(f"{k}={v}" for k, v in sorted(search_params.items()))
+        cache_key = f"places:nearby:{lat:.3f},{lng:.3f}:{radius}:{params}"
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-        # Drop categories with no results — they add no value to the UI
-        counts    = {k: v for k, v in counts.items()    if v > 0}
-        locations = {k: v for k, v in locations.items() if v}
+        # Simple API call - NO PAGINATION
+        _places_limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = self.client.places_nearby(
+                location=(lat, lng),
+                radius=radius,
+                **search_params
+            )
+        except Exception as e:
+            _places_limiter.release(time.monotonic() - started, overloaded=_is_overload(e))
+            raise
+        _places_limiter.release(time.monotonic() - started)
+
+        results = [
+            {
+                'name': place.get('name', 'Unknown'),
+                'lat': place['geometry']['location']['lat'],
+                'lng': place['geometry']['location']['lng'],
+                'address': place.get('vicinity', ''),
+                'place_id': place.get('place_id'),
+            }
+            for place in response.get('results', [])
+        ]
+        cache_set(cache_key, results, ttl=_PLACES_CACHE_TTL)
+        return results
 
-        return counts, locations
-    
     @staticmethod
     def _calculate_lifestyle_score(destination_counts: Dict[str, int]) -> float:
         total = sum(destination_counts.values())
@@ -207,19 +373,7 @@ class PlacesService:
         """Compare amenities between two locations based on user hobbies"""
         
         # Check if locations are the same (within ~200 meters)
-        from math import radians, cos, sin, asin, sqrt
-        
-        def haversine_distance(lat1, lon1, lat2, lon2):
-            """Calculate distance in meters between two coordinates"""
-            R = 6371000  # Earth radius in meters
-            lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            return R * c
-        
-        distance = haversine_distance(current_lat, current_lng, destination_lat, destination_lng)
+        distance = haversine_m(current_lat, current_lng, destination_lat, destination_lng)
         
         # If same location (within 200m), skip amenities search
         if distance < 200:
@@ -240,16 +394,19 @@ class PlacesService:
                 'search_radius': '1 mile'
             }
         
-        # Different locations - search with location data
-        print(f"\n🔍 Current location amenities:")
-        current_counts, _ = self.get_nearby_amenities_with_locations(
-            current_lat, current_lng, hobbies=hobbies
+        # Different locations - search both at once with location data
+        print(f"\n🔍 Current + destination location amenities:")
+        search_tasks = self._search_tasks(hobbies)
+        current_future = _location_pool.submit(
+            self.get_nearby_amenities_with_locations, current_lat, current_lng,
+            include_locations=False, search_tasks=search_tasks
         )
-        
-        print(f"\n🔍 Destination location amenities:")
-        destination_counts, destination_locations = self.get_nearby_amenities_with_locations(
-            destination_lat, destination_lng, hobbies=hobbies
+        destination_future = _location_pool.submit(
+            self.get_nearby_amenities_with_locations, destination_lat, destination_lng,
+            search_tasks=search_tasks
         )
+        current_counts, _ = current_future.result()
+        destination_counts, destination_locations = destination_future.result()
         
         # Calculate totals
         current_total = sum(current_counts.values())
@@ -344,19 +501,53 @@ class PlacesService:
                 departure_time="now"
             )
             
-            if result['rows'][0]['elements'][0]['status'] == 'OK':
-                duration = result['rows'][0]['elements'][0]['duration']['value'] // 60
-                distance = result['rows'][0]['elements'][0]['distance']['text']
-                
-                return {
-                    'duration_minutes': duration,
-                    'distance': distance,
-                    'method': mode,  # Return the actual method used
-                    'description': f"Your commute will be approximately {duration} minutes by {mode}."
-                }
+            return self._commute_result(result['rows'][0]['elements'][0], mode)
         except Exception as e:
             print(f"Commute calculation error: {e}")
         
+        return self._commute_result({}, mode)
+
+    def get_commute_info_batch(
+        self,
+        origins: List[Tuple[float, float]],
+        work_address: str,
+        mode: str = "driving"
+    ) -> List[Dict[str, Any]]:
+        """
+        Commute info from several origins to one work address, in *origins* order.
+        Origins go out _MAX_MATRIX_ORIGINS per distance_matrix call instead of one call each;
+        a failed call marks only its own origins as unavailable.
+        """
+        if not work_address:
+            return [self.get_commute_info(lat, lng, work_address, mode) for lat, lng in origins]
+
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(origins), _MAX_MATRIX_ORIGINS):
+            chunk = origins[start:start + _MAX_MATRIX_ORIGINS]
+            try:
+                matrix = self.client.distance_matrix(
+                    origins=chunk,
+                    destinations=[work_address],
+                    mode=mode,
+                    departure_time="now"
+                )
+                results.extend(self._commute_result(row['elements'][0], mode) for row in matrix['rows'])
+            except Exception as e:
+                print(f"Commute calculation error: {e}")
+                results.extend(self._commute_result({}, mode) for _ in chunk)
+        return results
+
+    @staticmethod
+    def _commute_result(element: Dict[str, Any], mode: str) -> Dict[str, Any]:
+        """Shape one distance_matrix element (origin -> work) into a commute dict."""
+        if element.get('status') == 'OK':
+            duration = element['duration']['value'] // 60
+            return {
+                'duration_minutes': duration,
+                'distance': element['distance']['text'],
+                'method': mode,  # Return the actual method used
+                'description': f"Your commute will be approximately {duration} minutes by {mode}."
+            }
         return {
             'duration_minutes': None,
             'distance': 'Unknown',
@@ -18,6 +18,17 @@ import logging
 import traceback
 from datetime import datetime
 
+from app.core.database import SessionLocal
+from app.core.redis_cache import _redis
+from app.models.analysis import Analysis
+from app.models.profile import UserProfile
+from app.services.places_service import places_service
+from app.services.crime_service import crime_service
+from app.services.cost_service import cost_service
+from app.services.noise_service import noise_service
+from app.services.scoring_service import scoring_service
+from app.services.llm_service import llm_service
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,13 +47,6 @@ async def _run_pipeline(
 ) -> dict:
     """All external API calls in parallel, returns a dict of fields to write to Analysis."""
 
-    from app.services.places_service import places_service
-    from app.services.crime_service import crime_service
-    from app.services.cost_service import cost_service
-    from app.services.noise_service import noise_service
-    from app.services.scoring_service import scoring_service
-    from app.services.llm_service import llm_service
-
     work_address = user_preferences.get('work_address')
     preferred_mode = user_preferences.get('commute_preference', 'driving')
     is_work_from_home = (
@@ -163,8 +167,7 @@ async def _run_pipeline(
     )
 
     # ── LLM (depends on scores) ───────────────────────────────────────────────
-    llm_analysis = await asyncio.to_thread(
-        llm_service.generate_lifestyle_analysis,
+    llm_analysis = await llm_service.generate_lifestyle_analysis(
         current_address, dest_address,
         crime_data, amenities_data, cost_data, noise_data, commute_data,
         user_preferences, scores,
@@ -186,8 +189,9 @@ async def _run_pipeline(
     clean_amenities = _clean(amenities_data)
     clean_commute   = _clean(commute_data)
 
+    # Callers pass the already-_clean'ed objects, so datetimes are ISO strings by now
     def _jdump(obj):
-        return json.dumps(_clean(obj))
+        return json.dumps(obj)
 
     return {
         # Legacy JSON columns
@@ -205,11 +209,11 @@ async def _run_pipeline(
         'overall_weighted_score':   scores['overall_score'],
         'overall_grade':            scores['grade'],
         # JSON text columns
-        'crime_data_json':     _jdump(crime_data),
-        'noise_data_json':     _jdump(noise_data),
-        'cost_data_json':      _jdump(cost_data),
-        'amenities_data_json': _jdump(amenities_data),
-        'commute_data_json':   _jdump(commute_data),
+        'crime_data_json':     _jdump(clean_crime),
+        'noise_data_json':     _jdump(clean_noise),
+        'cost_data_json':      _jdump(clean_cost),
+        'amenities_data_json': _jdump(clean_amenities),
+        'commute_data_json':   _jdump(clean_commute),
         # AI insights
         'overview_summary':  llm_analysis.get('overview_summary'),
         'lifestyle_changes': llm_analysis.get('lifestyle_changes'),
@@ -221,6 +225,22 @@ async def _run_pipeline(
     }
 
 
+def load_user_preferences(db, user_id: int) -> dict:
+    """The user's profile as the preference dict the pipeline and LLM prompt expect."""
+    user_profile = db.query(UserProfile).filter(
+        UserProfile.user_id == user_id
+    ).first()
+
+    return {
+        'work_hours':        (user_profile.work_hours        if user_profile else None) or '9:00 - 17:00',
+        'work_address':       user_profile.work_address       if user_profile else None,
+        'sleep_hours':       (user_profile.sleep_hours       if user_profile else None) or '23:00 - 07:00',
+        'noise_preference':  (user_profile.noise_preference  if user_profile else None) or 'moderate',
+        'hobbies':            user_profile.hobbies if user_profile and user_profile.hobbies else [],
+        'commute_preference':(user_profile.commute_preference if user_profile else None) or 'driving',
+    }
+
+
 # ---------------------------------------------------------------------------
 # Background task (runs inside FastAPI's event loop via BackgroundTasks)
 # ---------------------------------------------------------------------------
@@ -231,10 +251,6 @@ async def run_analysis_background(analysis_id: int) -> None:
     POST /analysis/ response has been sent to the client.
     No separate worker process needed.
     """
-    from app.core.database import SessionLocal
-    from app.models.analysis import Analysis
-    from app.models.profile import UserProfile
-
     logger.info("Starting background analysis for analysis_id=%d", analysis_id)
 
     db = SessionLocal()
@@ -247,18 +263,7 @@ async def run_analysis_background(analysis_id: int) -> None:
         analysis.status = 'processing'
         db.commit()
 
-        user_profile = db.query(UserProfile).filter(
-            UserProfile.user_id == analysis.user_id
-        ).first()
-
-        user_preferences = {
-            'work_hours':        (user_profile.work_hours        if user_profile else None) or '9:00 - 17:00',
-            'work_address':       user_profile.work_address       if user_profile else None,
-            'sleep_hours':       (user_profile.sleep_hours       if user_profile else None) or '23:00 - 07:00',
-            'noise_preference':  (user_profile.noise_preference  if user_profile else None) or 'moderate',
-            'hobbies':            user_profile.hobbies if user_profile and user_profile.hobbies else [],
-            'commute_preference':(user_profile.commute_preference if user_profile else None) or 'driving',
-        }
+        user_preferences = load_user_preferences(db, analysis.user_id)
 
         current_address = analysis.current_address
         dest_address    = analysis.destination_address
@@ -269,7 +274,6 @@ async def run_analysis_background(analysis_id: int) -> None:
         db = None
 
         # Geocode both addresses (moved here so POST /analysis/ returns instantly)
-        from app.services.places_service import places_service
         (current_lat, current_lng), (dest_lat, dest_lng) = await asyncio.gather(
             asyncio.to_thread(places_service.geocode_address, current_address),
             asyncio.to_thread(places_service.geocode_address, dest_address),
@@ -297,7 +301,6 @@ async def run_analysis_background(analysis_id: int) -> None:
 
         # Notify the SSE stream
         try:
-            from app.core.redis_cache import _redis
             r = _redis()
             if r:
                 r.publish(f"analysis:done:{user_id}", str(analysis_id))
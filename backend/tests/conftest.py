@@ -20,6 +20,9 @@ _gmaps_patcher.start()
 _groq_patcher = patch("groq.Groq", return_value=MagicMock())
 _groq_patcher.start()
 
+_async_groq_patcher = patch("groq.AsyncGroq", return_value=MagicMock())
+_async_groq_patcher.start()
+
 import json
 import pytest
 from fastapi.testclient import TestClient
@@ -56,6 +59,15 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    """Keep the in-process cache layer from leaking values between tests."""
+    from app.core.redis_cache import cache_clear_local
+    cache_clear_local()
+    yield
+    cache_clear_local()
+
+
 @pytest.fixture(autouse=True)
 def reset_db():
     """Create all tables before each test; drop them after."""
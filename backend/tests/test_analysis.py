@@ -5,9 +5,11 @@ external APIs (Google Maps, FBI, LLM, etc.) that would require heavy mocking.
 """
 import json
 import pytest
+from unittest.mock import patch
 from datetime import datetime, timezone, timedelta
 from app.models.analysis import Analysis
 from app.core.security import create_access_token
+from tests.conftest import TestingSessionLocal
 
 
 def make_analysis(db, user_id, **kwargs):
@@ -168,6 +170,53 @@ class TestGetAnalysis:
         assert resp.status_code == 403
 
 
+class TestStreamInsights:
+    EVENTS = [
+        {"event": "overview_summary", "data": "Streamed overview."},
+        {"event": "action_steps", "data": ["→ Visit"]},
+        {"event": "complete", "data": {"overview_summary": "Streamed overview.",
+                                       "lifestyle_changes": [], "ai_insights": "Streamed.",
+                                       "action_steps": ["→ Visit"]}},
+    ]
+
+    @pytest.fixture(autouse=True)
+    def _test_sessions(self):
+        # The handler saves the result with its own session
+        with patch("app.api.analysis.SessionLocal", TestingSessionLocal):
+            yield
+
+    def _fake_stream(self, *args, **kwargs):
+        async def gen():
+            for event in self.EVENTS:
+                yield event
+        return gen()
+
+    def test_sections_sent_as_sse_events(self, client, test_user, auth_headers, analysis):
+        with patch("app.api.analysis.llm_service.stream_lifestyle_analysis", self._fake_stream):
+            resp = client.get(f"/analysis/{analysis.id}/insights/stream", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert resp.text.startswith('event: overview_summary\ndata: "Streamed overview."\n\n')
+        assert "event: complete\n" in resp.text
+
+    def test_complete_result_is_saved(self, client, test_user, auth_headers, analysis):
+        with patch("app.api.analysis.llm_service.stream_lifestyle_analysis", self._fake_stream):
+            client.get(f"/analysis/{analysis.id}/insights/stream", headers=auth_headers)
+        data = client.get(f"/analysis/{analysis.id}", headers=auth_headers).json()
+        assert data["overview_summary"] == "Streamed overview."
+        assert data["action_steps"] == ["→ Visit"]
+
+    def test_unfinished_analysis_returns_409(self, client, test_user, auth_headers, db):
+        a = make_analysis(db, test_user.id, status="processing")
+        resp = client.get(f"/analysis/{a.id}/insights/stream", headers=auth_headers)
+        assert resp.status_code == 409
+
+    def test_other_users_analysis_returns_404(self, client, test_user, auth_headers, db):
+        other_analysis = make_analysis(db, test_user.id + 9999)
+        resp = client.get(f"/analysis/{other_analysis.id}/insights/stream", headers=auth_headers)
+        assert resp.status_code == 404
+
+
 class TestDeleteAnalysis:
     def test_delete_success(self, client, test_user, auth_headers, analysis):
         resp = client.delete(f"/analysis/{analysis.id}", headers=auth_headers)
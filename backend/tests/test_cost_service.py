@@ -15,6 +15,25 @@ class TestTotalMonthly:
     def test_known_city_substring(self):
         assert svc._total_monthly("456 Oak Ave, Boston, MA 02101") == 4300.0
 
+    def test_most_specific_locality_wins(self):
+        # Neighbourhood before city: Brooklyn, not the broader New York entry
+        assert svc._total_monthly("Atlantic Ave, Brooklyn, New York, NY") == 4200.0
+
+    def test_most_specific_locality_wins_without_street(self):
+        assert svc._total_monthly("Brooklyn, New York, NY 11201, USA") == 4200.0
+
+    def test_street_named_after_city_is_ignored(self):
+        assert svc._total_monthly("123 Houston St, New York, NY 10012, USA") == 4800.0
+        assert svc._total_monthly("45 Washington St, Boston, MA 02108, USA") == 4300.0
+
+    def test_street_named_after_city_falls_back_to_state(self):
+        assert svc._total_monthly("9 Denver Ave, Smallville, KS 66002") == 2400.0
+        assert svc._total_monthly("123 Houston St, TX 77002") == 2800.0
+
+    def test_longest_name_wins_at_same_position(self):
+        assert svc._total_monthly("Washington DC 20001") == 4000.0
+        assert svc._total_monthly("San Antonio, TX") == 2600.0
+
     def test_state_fallback_when_city_unknown(self):
         assert svc._total_monthly("Rural Town, TX 79000") == 2800.0
 
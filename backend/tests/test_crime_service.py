@@ -1,4 +1,5 @@
 """Unit tests for CrimeService — pure helpers + mocked FBI API."""
+import orjson
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from app.services.crime_service import CrimeService, _HOUR_WEIGHTS, _TOTAL_WEIGHT
@@ -97,6 +98,46 @@ class TestStaticRate:
         assert svc._static_rate("New York, NY") == 2331.0
 
 
+# ── _agency_columns / _nearest_agency ─────────────────────────────────────────
+
+AGENCIES = [
+    {"ori": "GA001", "agency_name": "Fulton County", "agency_type_name": "County",
+     "is_nibrs": True, "latitude": 33.750, "longitude": -84.390},
+    {"ori": "GA002", "agency_name": "Atlanta PD", "agency_type_name": "City",
+     "is_nibrs": True, "latitude": 33.760, "longitude": -84.390},
+    {"ori": "GA003", "agency_name": "Legacy SRS", "agency_type_name": "City",
+     "is_nibrs": False, "latitude": 33.750, "longitude": -84.390},
+    {"ori": "GA004", "agency_name": "No Coords", "agency_type_name": "City",
+     "is_nibrs": True, "latitude": None, "longitude": None},
+]
+
+
+class TestAgencyColumns:
+    def test_keeps_only_nibrs_with_coords(self, svc):
+        cols = svc._agency_columns(AGENCIES)
+        assert cols["ori"] == ["GA001", "GA002"]
+
+    def test_columns_are_parallel(self, svc):
+        cols = svc._agency_columns(AGENCIES)
+        assert len({len(v) for v in cols.values()}) == 1
+
+
+class TestNearestAgency:
+    def test_prefers_city_within_10km(self, svc):
+        cols = svc._agency_columns(AGENCIES)
+        agency = svc._nearest_agency(cols, 33.750, -84.390)
+        assert agency == {"ori": "GA002", "agency_name": "Atlanta PD"}
+
+    def test_returns_none_when_empty(self, svc):
+        assert svc._nearest_agency(svc._agency_columns([]), 33.75, -84.39) is None
+
+    @pytest.mark.parametrize("lat,lng", [(33.750, -84.390), (33.900, -84.100), (35.0, -83.0)])
+    def test_grid_matches_full_scan(self, svc, lat, lng):
+        cols = svc._agency_columns(AGENCIES)
+        grid = svc._agency_grid(cols)
+        assert svc._nearest_agency(cols, lat, lng, grid) == svc._nearest_agency(cols, lat, lng)
+
+
 # ── _rate_to_safety_score ────────────────────────────────────────────────────
 
 class TestRateToSafetyScore:
@@ -204,7 +245,7 @@ def make_httpx_mock(violent_data, property_data, larceny_data=None, burglary_dat
     def make_resp(data):
         r = MagicMock()
         r.status_code = status
-        r.json.return_value = data
+        r.content = orjson.dumps(data)
         return r
 
     mock_client = AsyncMock()
@@ -225,9 +266,7 @@ VALID_FBI_RESPONSE = {
 class TestFetchFbiRates:
     async def test_success_returns_dict(self, svc):
         mock_client = make_httpx_mock(VALID_FBI_RESPONSE, VALID_FBI_RESPONSE)
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.crime_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_fbi_rates("Atlanta, GA 30303, USA")
         assert result is not None
         assert "total" in result
@@ -240,10 +279,8 @@ class TestFetchFbiRates:
     async def test_both_rates_none_continues_to_next_year(self, svc):
         # Returns empty dict — both rates will be None, so it should retry and eventually return None
         mock_client = AsyncMock()
-        mock_client.get = AsyncMock(return_value=MagicMock(status_code=200, json=MagicMock(return_value={})))
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        mock_client.get = AsyncMock(return_value=MagicMock(status_code=200, content=b"{}"))
+        with patch("app.services.crime_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_fbi_rates("Atlanta, GA 30303, USA")
         assert result is None
 
@@ -252,13 +289,65 @@ class TestFetchFbiRates:
         mock_client.get = AsyncMock(
             side_effect=Exception("connection refused")
         )
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.crime_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_fbi_rates("Atlanta, GA 30303, USA")
         assert result is None
 
 
+class TestFbiGet:
+    async def test_retries_429_then_succeeds(self, svc):
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        ok = MagicMock(status_code=200)
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(side_effect=[throttled, ok])
+        with patch("app.services.crime_service.get_async_client", return_value=mock_client):
+            resp = await svc._fbi_get("https://example/V", {})
+        assert resp is ok
+        assert mock_client.get.call_count == 2
+
+    async def test_gives_up_after_max_attempts(self, svc):
+        unavailable = MagicMock(status_code=503, headers={"Retry-After": "0"})
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=unavailable)
+        with patch("app.services.crime_service.get_async_client", return_value=mock_client):
+            resp = await svc._fbi_get("https://example/V", {})
+        assert resp.status_code == 503
+        assert mock_client.get.call_count == 4
+
+    def test_retry_delay_honours_retry_after(self, svc):
+        assert svc._retry_delay(MagicMock(headers={"Retry-After": "3"}), 0) == 3.0
+
+    def test_retry_delay_is_capped(self, svc):
+        assert svc._retry_delay(MagicMock(headers={"Retry-After": "600"}), 0) == 8.0
+        assert 0 <= svc._retry_delay(MagicMock(headers={}), 10) <= 8.0
+
+
+class TestFetchAgencyRate:
+    AGENCY = {"ori": "GA0000000", "agency_name": "Test PD"}
+
+    async def _fetch(self, svc, status):
+        svc.api_key = "key"
+        resp = MagicMock(status_code=status, content=b"{}", text="", headers={"Retry-After": "0"})
+        with patch.object(svc, "_fetch_agency_list", AsyncMock(return_value={"ori": ["GA0000000"]})), \
+             patch.object(svc, "_nearest_agency", return_value=self.AGENCY), \
+             patch.object(svc, "_agency_grid", return_value={}), \
+             patch.object(svc, "_fbi_get", AsyncMock(return_value=resp)), \
+             patch("app.services.crime_service.cache_get", return_value=None), \
+             patch("app.services.crime_service.cache_set") as mock_set:
+            result = await svc._fetch_agency_rate("GA", 33.75, -84.39)
+        return result, [c.args[0] for c in mock_set.call_args_list]
+
+    async def test_outage_is_not_cached_as_no_data(self, svc):
+        result, keys = await self._fetch(svc, 503)
+        assert result is None
+        assert not any(k.startswith("fbi:agency_nodata:") for k in keys)
+
+    async def test_empty_agency_is_cached_as_no_data(self, svc):
+        result, keys = await self._fetch(svc, 200)
+        assert result is None
+        assert keys == ["fbi:agency_nodata:GA0000000"]
+
+
 # ── _get_rates ────────────────────────────────────────────────────────────────
 
 class TestGetRates:
@@ -276,6 +365,38 @@ class TestGetRates:
         assert result["total"] == 5218.0  # Chicago static rate
 
 
+# ── prefetch_states ───────────────────────────────────────────────────────────
+
+class TestPrefetchStates:
+    async def test_caches_each_state_rate(self, svc):
+        svc.api_key = None
+        with patch.object(svc, "_fetch_fbi_rates", AsyncMock(return_value=make_fbi())), \
+             patch("app.services.crime_service.cache_set") as mock_set:
+            refreshed = await svc.prefetch_states(["ca", " NY ", ""])
+        assert refreshed == 2
+        keys = [c.args[0] for c in mock_set.call_args_list]
+        assert keys == ["fbi:state:CA", "fbi:state:NY"]
+
+    async def test_skip_cached_leaves_cached_states_alone(self, svc):
+        svc.api_key = None
+        fetch = AsyncMock(return_value=make_fbi())
+        with patch.object(svc, "_fetch_fbi_rates", fetch), \
+             patch("app.services.crime_service.cache_get",
+                   side_effect=lambda k: make_fbi() if k == "fbi:state:CA" else None), \
+             patch("app.services.crime_service.cache_set") as mock_set:
+            refreshed = await svc.prefetch_states(["CA", "NY"], skip_cached=True)
+        assert refreshed == 1
+        fetch.assert_awaited_once_with("City, NY 00000, USA")
+        assert [c.args[0] for c in mock_set.call_args_list] == ["fbi:state:NY"]
+
+    async def test_no_data_is_not_cached(self, svc):
+        svc.api_key = None
+        with patch.object(svc, "_fetch_fbi_rates", AsyncMock(return_value=None)), \
+             patch("app.services.crime_service.cache_set") as mock_set:
+            assert await svc.prefetch_states(["CA"]) == 0
+        mock_set.assert_not_called()
+
+
 # ── compare_crime_data ────────────────────────────────────────────────────────
 
 class TestCompareCrimeData:
@@ -0,0 +1,35 @@
+"""Unit tests for geo helpers (pure math)."""
+import pytest
+
+from app.core.geo import geocode_cache_key, haversine_m, normalize_address
+
+
+class TestHaversineM:
+    def test_same_point_is_zero(self):
+        assert haversine_m(40.7128, -74.0060, 40.7128, -74.0060) == 0.0
+
+    def test_one_degree_of_latitude(self):
+        # ~111.2 km everywhere along a meridian
+        assert haversine_m(0.0, 0.0, 1.0, 0.0) == pytest.approx(111_195, rel=1e-3)
+
+    def test_new_york_to_los_angeles(self):
+        assert haversine_m(40.7128, -74.0060, 34.0522, -118.2437) == pytest.approx(3_936_000, rel=1e-2)
+
+    def test_symmetric(self):
+        a = haversine_m(33.749, -84.388, 45.515, -122.679)
+        b = haversine_m(45.515, -122.679, 33.749, -84.388)
+        assert a == pytest.approx(b)
+
+    def test_antipodal_points(self):
+        assert haversine_m(0.0, 0.0, 0.0, 180.0) == pytest.approx(20_015_087, rel=1e-3)
+
+
+class TestGeocodeCacheKey:
+    def test_case_and_spacing_insensitive(self):
+        assert geocode_cache_key("  123 Main St,  Boston ") == geocode_cache_key("123 main st, boston")
+
+    def test_distinct_addresses_distinct_keys(self):
+        assert geocode_cache_key("1 Main St") != geocode_cache_key("2 Main St")
+
+    def test_built_on_normalized_address(self):
+        assert geocode_cache_key(" 1 MAIN  St ") == f"geocode:{normalize_address('1 main st')}"
@@ -1,7 +1,9 @@
 """Unit tests for LLMService — mocked Groq client."""
+import asyncio
+import inspect
 import pytest
-from unittest.mock import MagicMock, patch
-from app.services.llm_service import LLMService
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.llm_service import LLMService, get_groq_client, close_groq_client
 
 
 @pytest.fixture
@@ -62,6 +64,10 @@ SAMPLE_DATA = {
     },
 }
 
+# Positional generate/stream_lifestyle_analysis arguments built from SAMPLE_DATA
+ANALYSIS_ARGS = ("A", "B", SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
+                 SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"], SAMPLE_DATA["commute_data"])
+
 WELL_FORMED_LLM_RESPONSE = """
 ---OVERVIEW---
 This is a good move overall with improved safety and lower costs.
@@ -87,6 +93,20 @@ You will save $6,000 per year which is significant.
 """
 
 
+# ── get_groq_client ───────────────────────────────────────────────────────────
+
+class TestGroqClient:
+    async def test_reused_within_event_loop(self):
+        with patch("app.services.llm_service.AsyncGroq") as factory:
+            factory.return_value.close = AsyncMock()
+            first = get_groq_client()
+            second = get_groq_client()
+            assert first is second
+            factory.assert_called_once()
+            await close_groq_client()
+            first.close.assert_awaited_once()
+
+
 # ── _parse_llm_response ───────────────────────────────────────────────────────
 
 class TestParseLlmResponse:
@@ -140,12 +160,32 @@ class TestParseLlmResponse:
         assert isinstance(result["lifestyle_changes"], list)
         assert isinstance(result["action_steps"], list)
 
+    def test_dashes_inside_section_body_kept(self, svc):
+        response = "---OVERVIEW---\nRent drops --- a lot.\n---INSIGHTS---\nDetails.\n---ACTION_STEPS---\n→ Go"
+        result = svc._parse_llm_response(response)
+        assert result["overview_summary"] == "Rent drops --- a lot."
+        assert result["action_steps"] == ["→ Go"]
+
     def test_returns_all_required_keys(self, svc):
         result = svc._parse_llm_response(WELL_FORMED_LLM_RESPONSE)
         for key in ("overview_summary", "lifestyle_changes", "ai_insights", "action_steps"):
             assert key in result
 
 
+class TestParseAsync:
+    async def test_normal_response_parsed_inline(self, svc):
+        with patch("app.services.llm_service.asyncio.to_thread", AsyncMock()) as to_thread:
+            result = await svc._parse_async(WELL_FORMED_LLM_RESPONSE)
+        to_thread.assert_not_called()
+        assert result == svc._parse_llm_response(WELL_FORMED_LLM_RESPONSE)
+
+    async def test_outsized_response_parsed_in_thread(self, svc):
+        response = "x" * 16384
+        with patch("app.services.llm_service.asyncio.to_thread", AsyncMock(return_value={})) as to_thread:
+            await svc._parse_async(response)
+        to_thread.assert_awaited_once_with(svc._parse_llm_response, response)
+
+
 # ── _build_analysis_prompt ────────────────────────────────────────────────────
 
 class TestBuildAnalysisPrompt:
@@ -221,6 +261,48 @@ class TestBuildAnalysisPrompt:
         )
         assert "Parks" in prompt or "parks" in prompt
 
+    def test_none_values_fall_back_to_defaults(self, svc):
+        noise = {"current": {"estimated_db": None, "noise_score": 60},
+                 "destination": {"estimated_db": 55.0}, "comparison": {}}
+        prompt = svc._build_analysis_prompt(
+            "A", "B",
+            crime_data=SAMPLE_DATA["crime_data"],
+            amenities_data=SAMPLE_DATA["amenities_data"],
+            cost_data=SAMPLE_DATA["cost_data"],
+            noise_data=noise,
+            commute_data=SAMPLE_DATA["commute_data"],
+        )
+        assert "Estimated Noise: 0.0 dB" in prompt
+        assert "Estimated Noise: 55.0 dB" in prompt
+
+    def test_skips_sections_without_data(self, svc):
+        prompt = svc._build_analysis_prompt(
+            "A", "B",
+            crime_data={},
+            amenities_data=SAMPLE_DATA["amenities_data"],
+            cost_data=SAMPLE_DATA["cost_data"],
+            noise_data=SAMPLE_DATA["noise_data"],
+            commute_data=SAMPLE_DATA["commute_data"],
+        )
+        assert "CRIME DATA" not in prompt
+        assert "Total Monthly" in prompt
+
+    def test_uses_compact_section_headers(self, svc):
+        prompt = svc._build_analysis_prompt(
+            "A", "B", **{k: SAMPLE_DATA[k] for k in
+            ["crime_data", "amenities_data", "cost_data", "noise_data", "commute_data"]}
+        )
+        assert "═" not in prompt
+        assert "## REAL CRIME DATA" in prompt
+
+    def test_instructions_kept_out_of_data_prompt(self, svc):
+        prompt = svc._build_analysis_prompt(
+            "A", "B", **{k: SAMPLE_DATA[k] for k in
+            ["crime_data", "amenities_data", "cost_data", "noise_data", "commute_data"]}
+        )
+        assert "## INSTRUCTIONS" not in prompt
+        assert "---OVERVIEW---" not in prompt
+
     def test_returns_string(self, svc):
         prompt = svc._build_analysis_prompt(
             "A", "B", **{k: SAMPLE_DATA[k] for k in
@@ -230,6 +312,27 @@ class TestBuildAnalysisPrompt:
         assert len(prompt) > 100
 
 
+# ── _estimate_output_budget ───────────────────────────────────────────────────
+
+class TestEstimateOutputBudget:
+    @pytest.mark.parametrize("prefs,scores", [
+        (None, None),
+        (SAMPLE_DATA["user_preferences"], None),
+        (None, SAMPLE_DATA["overall_scores"]),
+        (SAMPLE_DATA["user_preferences"], SAMPLE_DATA["overall_scores"]),
+    ])
+    def test_within_bounds(self, prefs, scores):
+        budget = LLMService._estimate_output_budget(prefs, scores)
+        assert 800 <= budget <= 2500
+
+    def test_grows_with_optional_sections(self):
+        lean = LLMService._estimate_output_budget(None, None)
+        full = LLMService._estimate_output_budget(
+            SAMPLE_DATA["user_preferences"], SAMPLE_DATA["overall_scores"]
+        )
+        assert lean < full
+
+
 # ── generate_lifestyle_analysis ───────────────────────────────────────────────
 
 class TestGenerateLifestyleAnalysis:
@@ -242,11 +345,11 @@ class TestGenerateLifestyleAnalysis:
         completion.choices = [choice]
         return completion
 
-    def test_success_returns_parsed_result(self, svc):
-        svc.client.chat.completions.create.return_value = self._mock_groq_response(
-            WELL_FORMED_LLM_RESPONSE
+    async def test_success_returns_parsed_result(self, svc):
+        svc.client.chat.completions.create = AsyncMock(
+            return_value=self._mock_groq_response(WELL_FORMED_LLM_RESPONSE)
         )
-        result = svc.generate_lifestyle_analysis(
+        result = await svc.generate_lifestyle_analysis(
             "New York, NY", "Los Angeles, CA",
             SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
             SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"],
@@ -256,9 +359,9 @@ class TestGenerateLifestyleAnalysis:
         assert "lifestyle_changes" in result
         assert "action_steps" in result
 
-    def test_api_exception_returns_fallback(self, svc):
-        svc.client.chat.completions.create.side_effect = Exception("API error")
-        result = svc.generate_lifestyle_analysis(
+    async def test_api_exception_returns_fallback(self, svc):
+        svc.client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
+        result = await svc.generate_lifestyle_analysis(
             "New York, NY", "Los Angeles, CA",
             SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
             SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"],
@@ -268,11 +371,11 @@ class TestGenerateLifestyleAnalysis:
         assert result["action_steps"] == []
         assert "temporarily unavailable" in result["overview_summary"].lower()
 
-    def test_with_user_preferences(self, svc):
-        svc.client.chat.completions.create.return_value = self._mock_groq_response(
-            WELL_FORMED_LLM_RESPONSE
+    async def test_with_user_preferences(self, svc):
+        svc.client.chat.completions.create = AsyncMock(
+            return_value=self._mock_groq_response(WELL_FORMED_LLM_RESPONSE)
         )
-        result = svc.generate_lifestyle_analysis(
+        result = await svc.generate_lifestyle_analysis(
             "A", "B",
             SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
             SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"],
@@ -281,3 +384,181 @@ class TestGenerateLifestyleAnalysis:
             overall_scores=SAMPLE_DATA["overall_scores"],
         )
         assert isinstance(result, dict)
+
+    async def test_summary_and_insights_routed_to_separate_models(self, svc):
+        overview, insights = WELL_FORMED_LLM_RESPONSE.split("---INSIGHTS---")
+        replies = {
+            "llama-3.1-8b-instant": overview,
+            "llama-3.3-70b-versatile": "---INSIGHTS---" + insights,
+        }
+
+        async def fake_create(**kwargs):
+            return self._mock_groq_response(replies[kwargs["model"]])
+
+        svc.client.chat.completions.create = AsyncMock(side_effect=fake_create)
+        result = await svc.generate_lifestyle_analysis(
+            "A", "B",
+            SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
+            SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"],
+            SAMPLE_DATA["commute_data"],
+        )
+        calls = svc.client.chat.completions.create.await_args_list
+        assert {c.kwargs["model"] for c in calls} == set(replies)
+        # Static instructions ride in the system message; the data message is shared
+        systems = {c.kwargs["messages"][0]["content"] for c in calls}
+        users = {c.kwargs["messages"][1]["content"] for c in calls}
+        assert len(systems) == 2 and all("## INSTRUCTIONS" in m for m in systems)
+        assert len(users) == 1
+        assert result == svc._parse_llm_response(WELL_FORMED_LLM_RESPONSE)
+
+    async def test_insights_failure_keeps_summary(self, svc):
+        overview = WELL_FORMED_LLM_RESPONSE.split("---INSIGHTS---")[0]
+
+        async def fake_create(**kwargs):
+            if kwargs["model"] == "llama-3.3-70b-versatile":
+                raise Exception("API error")
+            return self._mock_groq_response(overview)
+
+        svc.client.chat.completions.create = AsyncMock(side_effect=fake_create)
+        result = await svc.generate_lifestyle_analysis(
+            "A", "B",
+            SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
+            SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"],
+            SAMPLE_DATA["commute_data"],
+        )
+        assert "good move" in result["overview_summary"].lower()
+        assert len(result["lifestyle_changes"]) == 6
+        assert result["action_steps"] == []
+
+    async def test_timeout_returns_distinct_fallback(self, svc):
+        async def never_returns(**kwargs):
+            await asyncio.sleep(10)
+
+        svc.client.chat.completions.create = never_returns
+        with patch("app.services.llm_service._LLM_TIMEOUT", 0.01):
+            result = await svc.generate_lifestyle_analysis(
+                "A", "B",
+                SAMPLE_DATA["crime_data"], SAMPLE_DATA["amenities_data"],
+                SAMPLE_DATA["cost_data"], SAMPLE_DATA["noise_data"],
+                SAMPLE_DATA["commute_data"],
+            )
+        assert "temporarily unavailable" in result["overview_summary"].lower()
+        assert "did not respond" in result["ai_insights"]
+
+    async def test_many_keeps_order_and_isolates_failures(self, svc):
+        svc.client.chat.completions.create = AsyncMock(
+            return_value=self._mock_groq_response(WELL_FORMED_LLM_RESPONSE)
+        )
+        payload = {
+            "current_address": "A", "destination_address": "B",
+            **{k: SAMPLE_DATA[k] for k in
+               ["crime_data", "amenities_data", "cost_data", "noise_data", "commute_data"]},
+        }
+        results = await svc.generate_lifestyle_analysis_many([
+            payload,
+            {"current_address": "A"},  # missing required fields
+        ])
+        assert len(results) == 2
+        assert "good move" in results[0]["overview_summary"].lower()
+        assert "temporarily unavailable" in results[1]["overview_summary"].lower()
+
+    def test_signature_accepts_overall_scores(self):
+        params = inspect.signature(LLMService.generate_lifestyle_analysis).parameters
+        assert "overall_scores" in params
+        assert params["overall_scores"].default is None
+
+    async def test_repeat_inputs_served_from_cache(self, svc):
+        svc.client.chat.completions.create = AsyncMock(
+            return_value=self._mock_groq_response(WELL_FORMED_LLM_RESPONSE)
+        )
+        first = await svc.generate_lifestyle_analysis(*ANALYSIS_ARGS)
+        second = await svc.generate_lifestyle_analysis(*ANALYSIS_ARGS)
+        assert first == second
+        # Summary and insights calls for the first analysis only
+        assert svc.client.chat.completions.create.await_count == 2
+
+    async def test_floats_equal_to_2dp_share_cache_entry(self, svc):
+        svc.client.chat.completions.create = AsyncMock(
+            return_value=self._mock_groq_response(WELL_FORMED_LLM_RESPONSE)
+        )
+        for minutes in (25.001, 25.004):
+            commute = dict(SAMPLE_DATA["commute_data"], duration_minutes=minutes)
+            await svc.generate_lifestyle_analysis(*ANALYSIS_ARGS[:-1], commute)
+        assert svc.client.chat.completions.create.await_count == 2
+
+    async def test_failures_are_not_cached(self, svc):
+        svc.client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
+        await svc.generate_lifestyle_analysis(*ANALYSIS_ARGS)
+        await svc.generate_lifestyle_analysis(*ANALYSIS_ARGS)
+        assert svc.client.chat.completions.create.await_count == 4
+
+    async def test_concurrent_calls_respect_semaphore(self, svc):
+        in_flight = 0
+        peak = 0
+
+        async def fake_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return self._mock_groq_response(WELL_FORMED_LLM_RESPONSE)
+
+        svc.client.chat.completions.create = fake_create
+        with patch("app.services.llm_service.settings.GROQ_MAX_CONCURRENCY", 2):
+            results = await asyncio.gather(*(svc.generate_lifestyle_analysis(*ANALYSIS_ARGS) for _ in range(6)))
+        assert len(results) == 6
+        assert peak <= 2
+
+
+# ── stream_lifestyle_analysis ─────────────────────────────────────────────────
+
+class _FakeStream:
+    """Async iterator of Groq-style delta chunks that records how far it was read."""
+
+    def __init__(self, text, size=40):
+        self._pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        self.consumed = 0
+        self.response = MagicMock()
+        self.response.aclose = AsyncMock()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.consumed >= len(self._pieces):
+            raise StopAsyncIteration
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = self._pieces[self.consumed]
+        self.consumed += 1
+        return chunk
+
+
+class TestStreamLifestyleAnalysis:
+    async def test_overview_emitted_before_stream_finishes(self, svc):
+        stream = _FakeStream(WELL_FORMED_LLM_RESPONSE)
+        svc.client.chat.completions.create = AsyncMock(return_value=stream)
+        agen = svc.stream_lifestyle_analysis(*ANALYSIS_ARGS)
+        first = await agen.__anext__()
+        assert first["event"] == "overview_summary"
+        assert "good move" in first["data"].lower()
+        assert stream.consumed < len(stream._pieces)
+        await agen.aclose()
+        stream.response.aclose.assert_awaited_once()
+
+    async def test_events_match_parsed_result(self, svc):
+        svc.client.chat.completions.create = AsyncMock(return_value=_FakeStream(WELL_FORMED_LLM_RESPONSE))
+        events = [e async for e in svc.stream_lifestyle_analysis(*ANALYSIS_ARGS)]
+        assert [e["event"] for e in events] == [
+            "overview_summary", "lifestyle_changes", "ai_insights", "action_steps", "complete",
+        ]
+        result = events[-1]["data"]
+        assert result == svc._parse_llm_response(WELL_FORMED_LLM_RESPONSE)
+        assert events[1]["data"] == result["lifestyle_changes"]
+
+    async def test_api_exception_yields_error_event(self, svc):
+        svc.client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
+        events = [e async for e in svc.stream_lifestyle_analysis(*ANALYSIS_ARGS)]
+        assert len(events) == 1
+        assert events[0]["event"] == "error"
+        assert "temporarily unavailable" in events[0]["data"]["overview_summary"].lower()
@@ -144,6 +144,16 @@ class TestLevelDescription:
         level, _ = NoiseService._level_description(db)
         assert keyword in level
 
+    @pytest.mark.parametrize("db,expected", [
+        (75.0, "Very Loud (75-85 dB)"),
+        (74.9, "Loud (65-75 dB)"),
+        (45.0, "Quiet-Moderate (45-55 dB)"),
+        (44.9, "Quiet (below 45 dB)"),
+    ])
+    def test_band_boundaries(self, db, expected):
+        level, _ = NoiseService._level_description(db)
+        assert level == expected
+
 
 # ── _generate_impact_analysis ─────────────────────────────────────────────────
 
@@ -255,6 +265,14 @@ class TestEstimateNoiseLevel:
 
         assert "State Average" in result["data_source"]
 
+    async def test_skips_geocode_without_howloud_key(self, svc):
+        svc.howloud_api_key = None
+        geocode = AsyncMock(return_value=(33.7, -84.4))
+        with patch.object(svc, "_geocode_address", geocode):
+            result = await svc.estimate_noise_level("Atlanta, GA 30303, USA", "moderate")
+        geocode.assert_not_called()
+        assert "State Average" in result["data_source"]
+
     async def test_falls_back_to_national_when_no_state(self, svc):
         with patch.object(svc, "_geocode_address", AsyncMock(return_value=None)):
             result = await svc.estimate_noise_level("Unknown Place ZZ", "moderate")
@@ -280,12 +298,25 @@ class TestGeocodeAddress:
         }
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(return_value=mock_resp)
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._geocode_address("Atlanta, GA")
         assert result == (33.748, -84.387)
 
+    async def test_repeat_address_served_from_cache(self, svc):
+        svc.google_api_key = "fake-key"
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {
+            "status": "OK",
+            "results": [{"geometry": {"location": {"lat": 33.748, "lng": -84.387}}}],
+        }
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=mock_resp)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
+            first = await svc._geocode_address("Atlanta, GA")
+            second = await svc._geocode_address("  atlanta,  ga ")
+        assert first == second == (33.748, -84.387)
+        assert mock_client.get.await_count == 1
+
     async def test_no_api_key_returns_none(self, svc):
         svc.google_api_key = None
         result = await svc._geocode_address("Atlanta, GA")
@@ -297,9 +328,7 @@ class TestGeocodeAddress:
         mock_resp.json.return_value = {"status": "ZERO_RESULTS", "results": []}
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(return_value=mock_resp)
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._geocode_address("Nonexistent Place")
         assert result is None
 
@@ -307,9 +336,7 @@ class TestGeocodeAddress:
         svc.google_api_key = "fake-key"
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(side_effect=Exception("timeout"))
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._geocode_address("Atlanta, GA")
         assert result is None
 
@@ -324,9 +351,7 @@ class TestFetchHowloudScore:
         mock_resp.json.return_value = {"status": "OK", "result": [{"score": 70}]}
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(return_value=mock_resp)
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_howloud_score(33.7, -84.4)
         assert result == {"score": 70}
 
@@ -342,9 +367,7 @@ class TestFetchHowloudScore:
         mock_resp.text = "forbidden"
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(return_value=mock_resp)
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_howloud_score(33.7, -84.4)
         assert result is None
 
@@ -355,9 +378,7 @@ class TestFetchHowloudScore:
         mock_resp.json.return_value = {"status": "OK", "result": [{"no_score": True}]}
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(return_value=mock_resp)
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_howloud_score(33.7, -84.4)
         assert result is None
 
@@ -365,9 +386,7 @@ class TestFetchHowloudScore:
         svc.howloud_api_key = "fake"
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(side_effect=Exception("network error"))
-        with patch("httpx.AsyncClient") as MockClass:
-            MockClass.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            MockClass.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch("app.services.noise_service.get_async_client", return_value=mock_client):
             result = await svc._fetch_howloud_score(33.7, -84.4)
         assert result is None
 
@@ -405,3 +424,54 @@ class TestCompareNoiseLevels:
                           AsyncMock(side_effect=[current_result, dest_result])):
             result = await svc.compare_noise_levels("Noisy City", "Quiet Town", "quiet")
         assert result["comparison"]["is_quieter"] is True
+
+    async def test_repeat_howloud_comparison_served_from_cache(self, svc):
+        howloud_result = {
+            "score": 55.0, "noise_score": 85.0, "noise_category": "Moderate",
+            "description": "Moderate", "indicators": [], "level": "Moderate",
+            "preference_match": {"is_good_match": True, "quality": "balanced"},
+            "data_source": "HowLoud SoundScore API",
+        }
+        estimate = AsyncMock(return_value=howloud_result)
+        with patch.object(svc, "estimate_noise_level", estimate):
+            first = await svc.compare_noise_levels("Atlanta, GA", "Portland, OR", "moderate")
+            second = await svc.compare_noise_levels("atlanta, ga", "Portland,  OR", "Moderate")
+        assert first == second
+        assert estimate.await_count == 2
+
+    async def test_fallback_comparison_not_cached(self, svc):
+        fallback_result = {
+            "score": 55.0, "noise_score": 85.0, "noise_category": "Moderate",
+            "description": "Moderate", "indicators": [], "level": "Moderate",
+            "preference_match": {"is_good_match": True, "quality": "balanced"},
+            "data_source": "HowLoud SoundScore (State Average)",
+        }
+        estimate = AsyncMock(return_value=fallback_result)
+        with patch.object(svc, "estimate_noise_level", estimate):
+            await svc.compare_noise_levels("Atlanta, GA", "Portland, OR", "moderate")
+            await svc.compare_noise_levels("Atlanta, GA", "Portland, OR", "moderate")
+        assert estimate.await_count == 4
+
+
+# ── compare_noise_levels_batch ────────────────────────────────────────────────
+
+class TestCompareNoiseLevelsBatch:
+    async def test_current_estimated_once(self, svc):
+        def estimate(address, user_preference):
+            db = {"Here": 60.0, "A": 50.0, "B": 70.0}[address]
+            return {
+                "score": db, "noise_score": 80.0, "noise_category": "Moderate",
+                "description": "Moderate", "indicators": [], "level": "Moderate",
+                "preference_match": {"is_good_match": True, "quality": "balanced"},
+                "data_source": "test",
+            }
+        mock = AsyncMock(side_effect=estimate)
+        with patch.object(svc, "estimate_noise_level", mock):
+            results = await svc.compare_noise_levels_batch("Here", ["A", "B"], "moderate")
+        assert mock.await_count == 3
+        assert [r["comparison"]["is_quieter"] for r in results] == [True, False]
+        assert [r["db_difference"] for r in results] == [-10.0, 10.0]
+
+    async def test_empty_destinations(self, svc):
+        with patch.object(svc, "estimate_noise_level", AsyncMock(return_value={})):
+            assert await svc.compare_noise_levels_batch("Here", [], "moderate") == []
@@ -1,7 +1,7 @@
 """Unit tests for PlacesService — mocked googlemaps client."""
 import pytest
 from unittest.mock import MagicMock, patch
-from app.services.places_service import PlacesService
+from app.services.places_service import PlacesService, _AIMDLimiter
 
 
 @pytest.fixture
@@ -23,6 +23,21 @@ class TestGeocodeAddress:
         assert lat == 40.7128
         assert lng == -74.0060
 
+    def test_repeat_address_served_from_cache(self, svc):
+        svc.client.geocode.return_value = [
+            {"geometry": {"location": {"lat": 40.7128, "lng": -74.0060}}}
+        ]
+        first = svc.geocode_address("New York, NY")
+        second = svc.geocode_address("new york,  NY ")
+        assert first == second == (40.7128, -74.0060)
+        svc.client.geocode.assert_called_once()
+
+    def test_failed_lookup_not_cached(self, svc):
+        svc.client.geocode.return_value = []
+        svc.geocode_address("Nowhere")
+        svc.geocode_address("Nowhere")
+        assert svc.client.geocode.call_count == 2
+
     def test_empty_result_returns_none_tuple(self, svc):
         svc.client.geocode.return_value = []
         lat, lng = svc.geocode_address("Nonexistent Place")
@@ -106,6 +121,37 @@ class TestCalculateConvenienceScore:
         assert scores == sorted(scores, reverse=True)
 
 
+# ── _AIMDLimiter ──────────────────────────────────────────────────────────────
+
+class TestAIMDLimiter:
+    def _run(self, limiter, latency, n):
+        for _ in range(n):
+            limiter.acquire()
+            limiter.release(latency)
+
+    def test_fast_window_adds_one(self):
+        limiter = _AIMDLimiter(initial=4, window=4, latency_target=0.5)
+        self._run(limiter, 0.1, 4)
+        assert limiter.limit == 5
+
+    def test_slow_window_halves(self):
+        limiter = _AIMDLimiter(initial=8, window=4, latency_target=0.5)
+        self._run(limiter, 1.0, 4)
+        assert limiter.limit == 4
+
+    def test_overload_halves_immediately_with_floor(self):
+        limiter = _AIMDLimiter(initial=4, minimum=2)
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(0.1, overloaded=True)
+        assert limiter.limit == 2
+
+    def test_limit_capped_at_maximum(self):
+        limiter = _AIMDLimiter(initial=16, maximum=16, window=1, latency_target=0.5)
+        self._run(limiter, 0.1, 5)
+        assert limiter.limit == 16
+
+
 # ── get_nearby_amenities_with_locations ───────────────────────────────────────
 
 class TestGetNearbyAmenities:
@@ -145,6 +191,18 @@ class TestGetNearbyAmenities:
         counts, _ = svc.get_nearby_amenities_with_locations(40.7, -74.0, hobbies=["unknownhobby"])
         assert isinstance(counts, dict)
 
+    def test_hobby_phrase_matches_known_words(self, svc):
+        svc.client.places_nearby.return_value = self._make_places_response([])
+        svc.get_nearby_amenities_with_locations(40.7, -74.0, hobbies=["Coffee shops", "hiking and books"])
+        searched = {
+            (k, v)
+            for c in svc.client.places_nearby.call_args_list
+            for k, v in c.kwargs.items() if k in ("type", "keyword")
+        }
+        assert ("type", "cafe") in searched
+        assert ("keyword", "hiking trail") in searched
+        assert ("type", "library") in searched
+
     def test_no_hobbies_includes_defaults(self, svc):
         svc.client.places_nearby.return_value = self._make_places_response(
             [self._make_place("A")]
@@ -178,6 +236,52 @@ class TestGetNearbyAmenities:
         if "train stations" in counts:
             assert counts["train stations"] >= 1
 
+    def test_station_in_both_searches_counted_once(self, svc):
+        def side_effect(**kwargs):
+            if kwargs.get("type") == "subway_station":
+                return self._make_places_response([
+                    dict(self._make_place("Union Sq"), place_id="p1"),
+                    dict(self._make_place("Subway B"), place_id="p2"),
+                ])
+            if kwargs.get("type") == "train_station":
+                return self._make_places_response([dict(self._make_place("Union Sq"), place_id="p1")])
+            return self._make_places_response([])
+
+        svc.client.places_nearby.side_effect = side_effect
+        counts, locations = svc.get_nearby_amenities_with_locations(40.7, -74.0)
+        assert counts["train stations"] == 2
+        assert [loc["name"] for loc in locations["train stations"]] == ["Union Sq", "Subway B"]
+
+    def test_repeat_search_served_from_cache(self, svc):
+        svc.client.places_nearby.return_value = self._make_places_response(
+            [self._make_place("Store")]
+        )
+        first = svc.get_nearby_amenities_with_locations(40.7, -74.0)
+        calls = svc.client.places_nearby.call_count
+        second = svc.get_nearby_amenities_with_locations(40.7, -74.0)
+        assert first == second
+        assert svc.client.places_nearby.call_count == calls
+
+    def test_failed_search_not_cached(self, svc):
+        svc.client.places_nearby.side_effect = Exception("timeout")
+        svc._search_category(40.7, -74.0, 1609, "gyms", {"type": "gym"})
+        svc.client.places_nearby.side_effect = None
+        svc.client.places_nearby.return_value = self._make_places_response(
+            [self._make_place("City Gym")]
+        )
+        _, count, _, _ = svc._search_category(40.7, -74.0, 1609, "gyms", {"type": "gym"})
+        assert count == 1
+
+    def test_counts_only_skips_locations(self, svc):
+        svc.client.places_nearby.return_value = self._make_places_response(
+            [self._make_place("Store")]
+        )
+        counts, locations = svc.get_nearby_amenities_with_locations(
+            40.7, -74.0, include_locations=False
+        )
+        assert counts["restaurants"] == 1
+        assert locations == {}
+
     def test_location_data_format(self, svc):
         svc.client.places_nearby.return_value = self._make_places_response(
             [self._make_place("Store", lat=40.1, lng=-74.1)]
@@ -203,6 +307,14 @@ class TestCompareAmenities:
         result = svc.compare_amenities(40.7, -74.0, 34.0, -118.2)
         assert result["same_location"] is False
 
+    def test_hobbies_resolved_once_for_both_locations(self, svc):
+        svc.client.places_nearby.return_value = {"results": []}
+        with patch.object(PlacesService, "_search_tasks", wraps=PlacesService._search_tasks) as tasks:
+            svc.compare_amenities(40.7, -74.0, 34.0, -118.2, hobbies=["gym"])
+        tasks.assert_called_once_with(["gym"])
+        searched = [c.kwargs.get("type") for c in svc.client.places_nearby.call_args_list]
+        assert searched.count("gym") == 2
+
     def test_more_amenities_comparison_text(self, svc):
         svc.client.places_nearby.return_value = {
             "results": [
@@ -282,3 +394,40 @@ class TestGetCommuteInfo:
         result = svc.get_commute_info(40.7, -74.0, "Work", mode="driving")
         assert "30" in result["description"]
         assert "driving" in result["description"]
+
+
+# ── get_commute_info_batch ────────────────────────────────────────────────────
+
+class TestGetCommuteInfoBatch:
+    @staticmethod
+    def _ok(seconds):
+        return {"status": "OK", "duration": {"value": seconds}, "distance": {"text": "5 mi"}}
+
+    def test_one_call_for_all_origins(self, svc):
+        svc.client.distance_matrix.return_value = {
+            "rows": [{"elements": [self._ok(600)]},
+                     {"elements": [{"status": "ZERO_RESULTS"}]},
+                     {"elements": [self._ok(1800)]}]
+        }
+        results = svc.get_commute_info_batch([(40.7, -74.0), (0.0, 0.0), (40.8, -73.9)], "Work")
+        svc.client.distance_matrix.assert_called_once()
+        assert [r["duration_minutes"] for r in results] == [10, None, 30]
+
+    def test_origins_chunked_at_25(self, svc):
+        def matrix(origins, **kwargs):
+            return {"rows": [{"elements": [self._ok(60)]} for _ in origins]}
+        svc.client.distance_matrix.side_effect = matrix
+        results = svc.get_commute_info_batch([(40.0, -74.0)] * 30, "Work", mode="transit")
+        assert svc.client.distance_matrix.call_count == 2
+        assert len(results) == 30
+        assert all(r["method"] == "transit" for r in results)
+
+    def test_api_exception_marks_origins_unavailable(self, svc):
+        svc.client.distance_matrix.side_effect = Exception("quota exceeded")
+        results = svc.get_commute_info_batch([(40.7, -74.0), (40.8, -73.9)], "Work")
+        assert [r["duration_minutes"] for r in results] == [None, None]
+
+    def test_no_work_address(self, svc):
+        results = svc.get_commute_info_batch([(40.7, -74.0)], "")
+        assert results[0]["duration_minutes"] is None
+        svc.client.distance_matrix.assert_not_called()